@@ -1,3 +1,4 @@
+import atexit
 import logging
 import os
 # dessmonitor/api.py
@@ -10,6 +11,13 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Optional, Union
 
+try:
+    import orjson
+
+    _loads = orjson.loads        # принимает bytes — без промежуточного str
+except ImportError:
+    _loads = json.loads          # json.loads тоже понимает bytes (utf-8)
+
 from app.logger import loki_handler
 from shared_state.shared_state import shared_state
 
@@ -17,10 +25,87 @@ _TOKEN_FILE = Path(
     os.getenv("MONITOR_TOKEN_PATH", "app/cache/dess_token.json")
 )
 
+# обновляем токен заранее: за max(10% срока, TOKEN_REFRESH_SKEW_S) до истечения,
+# чтобы расхождение часов с сервером не приводило к TOKEN_EXPIRED-ретраю
+TOKEN_REFRESH_SKEW_S = 300
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HTTP: одна keep-alive сессия на процесс
+# ──────────────────────────────────────────────────────────────────────────────
+# Опрос идёт раз в несколько секунд на один и тот же хост — без пула каждый
+# запрос заново делает TCP + TLS handshake. URL уходит как есть (подпись
+# считается по готовой строке), повторяем только неудачный connect:
+# повтор уже отправленного подписанного запроса сервер может отвергнуть.
+# pool_connections=2: api.dessmonitor.com и web.dessmonitor.com (fallback) —
+# с одним пулом переход на веб-кролл и обратно выбрасывал бы живое соединение.
+# pool_maxsize=1: запросы идут строго по очереди из InverterMonitor, второй
+# сокет на тот же хост не нужен.
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    _SESSION = requests.Session()
+    _SESSION.mount("https://", HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=1,
+        max_retries=Retry(total=2, connect=2, read=0, status=0,
+                          backoff_factor=0.5),
+    ))
+
+    def _http_get(url: str, timeout: float) -> bytes:
+        # текст исключений requests содержит полный подписанный URL
+        # (sign/token/pn/sn) — наружу отдаём только код/класс ошибки.
+        # Поднимаем уже вне except: иначе исходное исключение с URL осталось
+        # бы в __context__ и всплыло бы в traceback.
+        try:
+            resp = _SESSION.get(url, timeout=timeout)
+            resp.raise_for_status()
+            return resp.content
+        except requests.HTTPError as e:
+            r = e.response
+            err = (f"HTTP Error {r.status_code}: {r.reason}" if r is not None
+                   else "HTTP Error")
+        except requests.RequestException as e:
+            # MaxRetryError.reason: NewConnectionError / ConnectTimeoutError / …
+            inner = e.args[0] if e.args else None
+            reason = getattr(inner, "reason", None)
+            detail = f" ({type(reason).__name__})" if reason is not None else ""
+            err = f"{type(e).__name__}{detail}"
+        raise OSError(err)
+
+    atexit.register(_SESSION.close)
+except ImportError:
+    def _http_get(url: str, timeout: float) -> bytes:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return resp.read()
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Модель данных
 # ──────────────────────────────────────────────────────────────────────────────
 
+def _to_float(val) -> Optional[float]:
+    """float(val) или None. Пустые значения — частый случай — без исключения."""
+    if val is None or val == "":
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+# working_state → подпись режима для summary(); неизвестные — «ℹ️ <как есть>»
+_MODE_ICONS = {
+    "Line Mode": "⚡ Сеть",
+    "Battery Mode": "🔋 Батарея",
+    "PV Mode": "☀️  Солнечные",
+    "Power Saving Mode": "💤 Энергосбер.",
+    "Standby Mode": "⏸️  Ожидание",
+    "Bypass Mode": "↪️  Bypass",
+    "Fault Mode": "❌ Ошибка",
+    "Invert Mode": "🔋 Инвертор",
+}
+
 @dataclass
 class DeviceData:
     timestamp: Optional[str] = None
@@ -52,23 +137,12 @@ class DeviceData:
 
     def summary(self) -> str:
         """Красивое многострочное резюме для inverter.log."""
-        mode_icons = {
-            "Line Mode": "⚡ Сеть",
-            "Battery Mode": "🔋 Батарея",
-            "PV Mode": "☀️  Солнечные",
-            "Power Saving Mode": "💤 Энергосбер.",
-            "Standby Mode": "⏸️  Ожидание",
-            "Bypass Mode": "↪️  Bypass",
-            "Fault Mode": "❌ Ошибка",
-            "Invert Mode": "🔋 Инвертор",
-        }
         mode_txt = self.working_state or "—"
-        mode_icon = mode_icons.get(mode_txt, f"ℹ️ {mode_txt}")
+        mode_icon = _MODE_ICONS.get(mode_txt) or f"ℹ️ {mode_txt}"
 
         # если нет активной мощности — подставим кажущуюся
         out_power = self.output_power if self.output_power is not None else self.output_apparent_power
         # Получаем температуру воды из shared_state
-        temp_raw = shared_state.get("temp_current")
         water_temp = shared_state.get("water_temp") or shared_state.get("pondtemp")
         # ── helper ──────────────────────────────────────────────
         def fmt(val, unit: str = "", width: int = 5, prec: int = 1):
@@ -152,6 +226,30 @@ class DessAPI:
         "Output Source Priority": "output_priority",
     }
 
+    # строковые поля — кладём как есть, остальные приводим к float
+    STRING_FIELDS = frozenset({
+        "timestamp", "working_state", "battery_status", "pv_status",
+        "mains_status", "load_status", "charger_priority", "output_priority",
+    })
+
+    # title → (поле DeviceData, строковое ли) — один lookup на элемент
+    FIELD_TABLE: dict[str, tuple[str, bool]] = {}
+    for _title, _field in TITLE_MAPPING.items():
+        FIELD_TABLE[_title] = (_field, _field in STRING_FIELDS)
+    # запасной вариант для промахов: сервер местами меняет регистр заголовков
+    FIELD_TABLE_CI: dict[str, tuple[str, bool]] = {}
+    for _title, _entry in FIELD_TABLE.items():
+        FIELD_TABLE_CI.setdefault(_title.lower(), _entry)
+    del _title, _field, _entry
+
+    @classmethod
+    def _lookup_field(cls, title) -> Optional[tuple[str, bool]]:
+        """title → (поле, строковое ли); точное совпадение, затем без регистра."""
+        entry = cls.FIELD_TABLE.get(title)
+        if entry is None and isinstance(title, str):
+            entry = cls.FIELD_TABLE_CI.get(title.lower())
+        return entry
+
     def __init__(self, config, logger):
         self.email = config.email
         self.password = config.password
@@ -165,6 +263,34 @@ class DessAPI:
         self.secret: Optional[str] = None
         self.token_expiry: Optional[float] = None
         self.token_acquired_time: Optional[float] = None
+        # когда обновлять токен, по time.monotonic() (см. _arm_token_deadline)
+        self._token_deadline: Optional[float] = None
+        # sha1(пароля) не меняется — считаем один раз, при первой авторизации
+        # (лениво: без пароля в конфиге __init__ не должен падать)
+        self._pwd_hash: Optional[bytes] = None
+        # (secret, token) -> их bytes для подписи; пересобираем при смене токена
+        self._cred_key: tuple = (None, None)
+        self._cred_bytes: bytes = b""
+        # query опроса и updateToken неизменны между запросами (меняются
+        # только sign/salt/token в голове URL) — собираем один раз
+        self._query_last_data = self._build_query({
+            "action": "queryDeviceLastData",
+            "i18n": "en_US",
+            "pn": self.pn,
+            "devcode": self.dev_code,
+            "devaddr": self.dev_addr,
+            "sn": self.sn,
+        })
+        self._query_update_token = self._build_query({"action": "updateToken"})
+        # веб-кролл: без служебных полей, ведущий '&' — часть подписанной строки
+        self._query_sp_last_data = "&" + urllib.parse.urlencode({
+            "action": "querySPDeviceLastData",
+            "pn": self.pn,
+            "devcode": self.dev_code,
+            "devaddr": self.dev_addr,
+            "sn": self.sn,
+            "i18n": "en_US",
+        })
         self._load_cached_token()  # ← попробуем
 
         if not self.token:  # первый запуск или токен протух
@@ -194,12 +320,24 @@ class DessAPI:
 
         salt = str(int(time.time() * 1000))
         if use_password:
-            pwd_hash = self._sha1_hex(self.password)
-            raw = f"{salt}{pwd_hash}{param_str}"
+            cred = self._pwd_hash
+            if cred is None:
+                cred = self._pwd_hash = self._sha1_hex(self.password).encode("ascii")
         else:
-            # self.secret/self.token точно строки к этому моменту
-            raw = f"{salt}{self.secret}{self.token}{param_str}"
-        return self._sha1_hex(raw), salt
+            # self.secret/self.token точно строки к этому моменту;
+            # bytes secret+token собираем только при смене токена
+            key = (self.secret, self.token)
+            if key != self._cred_key:
+                self._cred_key = key
+                self._cred_bytes = f"{self.secret}{self.token}".encode("utf-8")
+            cred = self._cred_bytes
+
+        # sha1(salt + cred + params) кормим по частям, без склейки строк:
+        # соль идёт первой, поэтому префикс всё равно не закэшировать
+        h = hashlib.sha1(salt.encode("ascii"))
+        h.update(cred)
+        h.update(param_str.encode("utf-8"))
+        return h.hexdigest(), salt
 
     @staticmethod
     def _redact_url(url: str) -> str:
@@ -209,7 +347,7 @@ class DessAPI:
         All credential, device-identifying, and app-identifying parameters
         are replaced with "REDACTED".
 
-        The actual URL passed to urllib.request.urlopen is never changed.
+        The actual URL passed to _http_get is never changed.
         """
         REDACTED = "REDACTED"
         SENSITIVE_QUERY_PARAMS = frozenset({
@@ -236,23 +374,22 @@ class DessAPI:
     # ──────────────────────────────────────────────────────────
     # HTTP запрос
     # ──────────────────────────────────────────────────────────
-    def _do_api_request(self, params: dict, need_auth: bool = True) -> dict:
-        # 1) копируем исходный словарь
-        params = params.copy()
-
-        # 2) служебные поля в конце
-        params.update({
+    def _build_query(self, params: dict) -> str:
+        """query в исходном порядке + служебные поля в конце."""
+        params = {
+            **params,
             "source": "1",
             "_app_client_": self.APP_CLIENT,
             "_app_id_": self.APP_ID,
-            "_app_version_": self.APP_VERSION
-        })
+            "_app_version_": self.APP_VERSION,
+        }
+        # urlencode: quote_plus(str(k))=quote_plus(str(v)) в порядке dict'а
+        return urllib.parse.urlencode(params)
 
-        # 3) query в исходном порядке
-        query_str = "&".join(
-            f"{urllib.parse.quote_plus(str(k))}={urllib.parse.quote_plus(str(v))}"
-            for k, v in params.items()
-        )
+    def _do_api_request(self, params: Optional[dict], need_auth: bool = True,
+                        precomputed_query: Optional[str] = None) -> dict:
+        # 1-3) query: готовая строка (см. __init__) или собираем из params
+        query_str = precomputed_query or self._build_query(params or {})
 
         # 4) подпись
         sign, salt = self._generate_sign(query_str, use_password=not need_auth)
@@ -267,9 +404,8 @@ class DessAPI:
         self.logger.info(f"[API] Выполняем запрос: {self._redact_url(url)}")
 
         try:
-            with urllib.request.urlopen(url, timeout=120) as resp:
-                raw_data = resp.read()
-            data = json.loads(raw_data.decode("utf-8"))
+            raw_data = _http_get(url, timeout=120)
+            data = _loads(raw_data)
             if data.get("err") != 0:
                 desc = data.get("desc", "Unknown error")
                 if "TOKEN" in desc or data.get("err") == 0x0002:
@@ -291,7 +427,6 @@ class DessAPI:
         # ⚠️ Credentials не логируются в целях безопасности
         self.logger.debug("[AUTH] Authenticating with provided credentials")
 
-        pwd_hash = self._sha1_hex(self.password)
         params = {"action": "authSource", "usr": self.email, "company-key": self.company_key}
         result = self._do_api_request(params, need_auth=False)
         dat = result.get("dat", {})
@@ -299,6 +434,7 @@ class DessAPI:
         self.secret = dat.get("secret")
         self.token_expiry = dat.get("expire")
         self.token_acquired_time = time.time()
+        self._arm_token_deadline()
         if not self.token or not self.secret:
             raise RuntimeError("Не получены token/secret от authSource.")
         self.logger.info("Успешно авторизованы. Получен token.")
@@ -306,20 +442,34 @@ class DessAPI:
 
     def refresh_token(self) -> None:
         self.logger.info("Обновление токена (updateToken)...")
-        params = {"action": "updateToken"}
-        result = self._do_api_request(params, need_auth=True)
+        result = self._do_api_request(
+            None, need_auth=True, precomputed_query=self._query_update_token)
         dat = result.get("dat", {})
         self.token = dat.get("token") or self.token
         self.secret = dat.get("secret") or self.secret
         self.token_expiry = dat.get("expire") or self.token_expiry
         self.token_acquired_time = time.time()
+        self._arm_token_deadline()
         self.logger.info("Токен обновлён.")
         self._save_token()
 
-    def should_refresh_token(self) -> bool:
+    def _arm_token_deadline(self) -> None:
+        """
+        Переводит (token_acquired_time, token_expiry) — wall-clock, их же
+        пишем в кеш — в абсолютный монотонный дедлайн. Дальше каждый опрос
+        сравнивает одно число, и скачок системных часов его не сдвигает.
+        """
         if self.token_expiry is None or self.token_acquired_time is None:
-            return True
-        return (time.time() - self.token_acquired_time) >= 0.9 * float(self.token_expiry)
+            self._token_deadline = None
+            return
+        ttl = float(self.token_expiry)
+        margin = max(0.1 * ttl, TOKEN_REFRESH_SKEW_S)
+        age = max(0.0, time.time() - self.token_acquired_time)
+        self._token_deadline = time.monotonic() - age + ttl - margin
+
+    def should_refresh_token(self) -> bool:
+        deadline = self._token_deadline
+        return deadline is None or time.monotonic() >= deadline
 
     # ──────────────────────────────────────────────────────────
     # Публичные методы
@@ -335,15 +485,19 @@ class DessAPI:
                     self.logger.info(f"[API] ошибка обновления токена: {auth_exc}. Пытаемся полную аутентификацию...")
                     self.authenticate()
 
-            params = {
-                "action": "queryDeviceLastData",
-                "i18n": "en_US",
-                "pn": self.pn,
-                "devcode": self.dev_code,
-                "devaddr": self.dev_addr,
-                "sn": self.sn,
-            }
-            result = self._do_api_request(params, need_auth=True)
+            # TOKEN_EXPIRED посреди срока (сервер отозвал токен): одна
+            # переавторизация и повтор, а не веб-кролл с тем же протухшим токеном
+            for attempt in range(2):
+                try:
+                    result = self._do_api_request(
+                        None, need_auth=True,
+                        precomputed_query=self._query_last_data)
+                    break
+                except TokenExpiredError:
+                    if attempt:
+                        raise
+                    self.logger.info("[API] токен отклонён сервером, переавторизуемся...")
+                    self.authenticate()
             dd = self._parse_device_data(result)
             return dd
 
@@ -355,14 +509,7 @@ class DessAPI:
         """
         Резервный вариант: web-кролл querySPDeviceLastData
         """
-        action_str = (
-            "&action=querySPDeviceLastData"
-            f"&pn={urllib.parse.quote_plus(str(self.pn))}"
-            f"&devcode={urllib.parse.quote_plus(str(self.dev_code))}"
-            f"&devaddr={urllib.parse.quote_plus(str(self.dev_addr))}"
-            f"&sn={urllib.parse.quote_plus(str(self.sn))}"
-            "&i18n=en_US"
-        )
+        action_str = self._query_sp_last_data
 
         # подпись и salt (нормализация & сделается внутри _generate_sign)
         sign, salt = self._generate_sign(action_str, use_password=False)
@@ -374,9 +521,7 @@ class DessAPI:
         self.logger.info(f"[WEB] Выполняем запрос: {self._redact_url(url)}")
 
         try:
-            with urllib.request.urlopen(url, timeout=20) as resp:
-                raw = resp.read().decode("utf-8")
-            payload = json.loads(raw)
+            payload = _loads(_http_get(url, timeout=20))
         except Exception as e:
             self.logger.error(f"[WEB] Ошибка запроса: {e}")
             raise RuntimeError(f"Веб-кролл не удался: {e}")
@@ -414,32 +559,34 @@ class DessAPI:
                 pass
 
         # pars — словарь массивов: gd_, sy_, pv_, bt_, bc_
-        parsed_fields = []  # ⬅️ Для отладки
-        for section_name, section in dat.get("pars", {}).items():
+        parsed_fields = []  # ⬅️ Для отладки: только имена, значения берём из dd
+        lookup = self._lookup_field
+        for section in dat.get("pars", {}).values():
             for item in section:
                 title = item.get("par")
-                val = item.get("val")
-                field = self.TITLE_MAPPING.get(title)
-                if not field:
+                entry = lookup(title)
+                if entry is None:
                     continue
 
-                if field in [
-                    "timestamp", "working_state", "battery_status",
-                    "pv_status", "mains_status", "load_status",
-                    "charger_priority", "output_priority"
-                ]:
+                field, is_str = entry
+                val = item.get("val")
+                if is_str:
                     setattr(dd, field, val)
-                    parsed_fields.append(f"{field}={val}")
+                    parsed_fields.append(field)
                 else:
-                    try:
-                        float_val = float(val)
-                        setattr(dd, field, float_val)
-                        parsed_fields.append(f"{field}={float_val}")
-                    except Exception as e:
-                        self.logger.warning(f"[WEB] Не удалось преобразовать {title}={val} в float: {e}")
-                        setattr(dd, field, None)
-
-        self.logger.info(f"[WEB] Успешно спарсили {len(parsed_fields)} полей: {', '.join(parsed_fields[:5])}...")
+                    float_val = _to_float(val)
+                    setattr(dd, field, float_val)
+                    if float_val is not None:
+                        parsed_fields.append(field)
+                    elif val not in (None, ""):
+                        self.logger.warning("[WEB] Не удалось преобразовать %s=%r в float",
+                                            title, val)
+
+        # строку «field=val» собираем только для первых 5 полей превью
+        self.logger.info(
+            "[WEB] Успешно спарсили %d полей: %s...", len(parsed_fields),
+            ", ".join(f"{f}={getattr(dd, f)}" for f in parsed_fields[:5]),
+        )
         return dd
 
     # ──────────────────────────────────────────────────────────
@@ -447,20 +594,17 @@ class DessAPI:
     # ──────────────────────────────────────────────────────────
     def _parse_device_data(self, data: dict) -> DeviceData:
         dd = DeviceData()
+        lookup = self._lookup_field
         for item in data.get("dat", []):
-            title = item.get("title", "").strip()
+            entry = lookup(item.get("title", "").strip())
+            if entry is None:
+                continue
+            field, is_str = entry
             val = item.get("val", "").strip()
-            field = self.TITLE_MAPPING.get(title)
-            if field:
-                if field in ["timestamp", "working_state", "battery_status",
-                             "pv_status", "mains_status", "load_status",
-                             "charger_priority", "output_priority"]:
-                    setattr(dd, field, val)
-                else:
-                    try:
-                        setattr(dd, field, float(val))
-                    except ValueError:
-                        setattr(dd, field, None)
+            if is_str:
+                setattr(dd, field, val)
+            else:
+                setattr(dd, field, _to_float(val))
         return dd
 
     # ──────────────────────────────────────────────────────────
@@ -477,6 +621,7 @@ class DessAPI:
                 self.secret = data["secret"]
                 self.token_expiry = data["expires_in"]
                 self.token_acquired_time = data["acquired_at"]
+                self._arm_token_deadline()
                 self.logger.info("[API] Восстановили token из кеша")
         except Exception as e:
             self.logger.error(f"[API] не смогли прочитать кеш token: {e}")
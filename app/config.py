@@ -22,14 +22,16 @@ class Config:                                 # прежний API остаёт
     def __init__(self, path: str | Path | None = None) -> None:
         cfg_dict = self._load_config(path)
 
-        # ↓ ниже – вся старая распаковка полей (ничего не ломаем)
+        # ↓ ниже – вся старая распаковка полей (ничего не ломаем).
+        #   Типы приводим здесь, один раз: в JSON devaddr/port бывают и
+        #   числом, и строкой, а горячий путь дальше видит только готовое.
         self.email          = cfg_dict.get("email")
         self.password       = cfg_dict.get("password")
         self.company_key    = cfg_dict.get("company_key", "")
-        self.pn             = cfg_dict.get("pn")
-        self.dev_code       = cfg_dict.get("devcode")
-        self.dev_addr       = cfg_dict.get("devaddr", 1)
-        self.sn             = cfg_dict.get("sn")
+        self.pn             = _opt_str(cfg_dict.get("pn"))
+        self.dev_code       = _opt_str(cfg_dict.get("devcode"))
+        self.dev_addr       = str(cfg_dict.get("devaddr", 1))
+        self.sn             = _opt_str(cfg_dict.get("sn"))
         self.web_fallback_url = cfg_dict.get("web_fallback_url")
         self.interval       = cfg_dict.get("interval", 30)
         self.log_file       = cfg_dict.get("log_file", "logs/dessmonitor.log")
@@ -37,10 +39,18 @@ class Config:                                 # прежний API остаёт
         mqtt                = cfg_dict.get("mqtt", {})
         self.mqtt_enabled   = mqtt.get("enabled", False)
         self.mqtt_host      = mqtt.get("host", "localhost")
-        self.mqtt_port      = mqtt.get("port", 1883)
+        self.mqtt_port      = int(mqtt.get("port", 1883))
         self.mqtt_topic     = mqtt.get("topic", "home/dessmonitor")
         self.mqtt_user      = mqtt.get("username", "")
         self.mqtt_pass      = mqtt.get("password", "")
+        # пакетная публикация: до batch_max сэмплов за batch_ms → один JSON-массив
+        self.mqtt_batch_ms  = float(mqtt.get("batch_ms", 0))
+        self.mqtt_batch_max = int(mqtt.get("batch_max", 1))
+        # retain: поздний подписчик сразу получает последнее сообщение
+        self.mqtt_retain    = _as_bool(mqtt.get("retain", False))
+        # предел внутренней очереди paho; 0 (как у paho) — без предела:
+        # ограничивает и отбрасывает старое уже очередь MqttHandler
+        self.mqtt_max_queued = int(mqtt.get("max_queued", 0))
 
     # ────────────────────────────────────────────────────────────────
     @staticmethod
@@ -71,6 +81,17 @@ class Config:                                 # прежний API остаёт
 
 
 # ───── helper ───────────────────────────────────────────────────────
+def _opt_str(v: Any) -> str | None:
+    return None if v is None else str(v)
+
+
+def _as_bool(v: Any) -> bool:
+    # "false"/"0"/"no" из ENV-JSON или руками набранного конфига — это False
+    if isinstance(v, str):
+        return v.strip().lower() in ("true", "1", "yes", "on")
+    return bool(v)
+
+
 def _read_json(p: str | Path) -> Dict[str, Any]:
     try:
         return json.loads(Path(p).read_text(encoding="utf-8"))
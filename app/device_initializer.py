@@ -5,6 +5,7 @@ import os
 import shutil
 import logging
 import tempfile
+import threading
 from datetime import datetime
 
 from app.devices.relay_channel_device import RelayChannelDevice, ANALOG_TYPES
@@ -35,15 +36,21 @@ class DeviceInitializer:
 
     _instance = None
     _instance_path = None
+    # guards first construction/parse only; repeat calls take the fast path
+    _lock = threading.RLock()
 
     def __new__(cls, config_path=None):
         resolved = cls._resolve_config_path(config_path)
-        if cls._instance is not None and cls._instance_path == resolved:
-            return cls._instance
-        instance = super().__new__(cls)
-        cls._instance = instance
-        cls._instance_path = resolved
-        return instance
+        instance = cls._instance
+        if instance is not None and cls._instance_path == resolved:
+            return instance
+        with cls._lock:
+            if cls._instance is not None and cls._instance_path == resolved:
+                return cls._instance
+            instance = super().__new__(cls)
+            cls._instance = instance
+            cls._instance_path = resolved
+            return instance
 
     @staticmethod
     def _resolve_config_path(config_path: str | None) -> str:
@@ -64,7 +71,11 @@ class DeviceInitializer:
     def __init__(self, config_path: str | None = None):
         if getattr(self, "initialized", False):
             return
+        with self._lock:
+            if not getattr(self, "initialized", False):
+                self._load(config_path)
 
+    def _load(self, config_path: str | None) -> None:
         self._config_path = self._resolve_config_path(config_path)
 
         if not os.path.exists(self._config_path):
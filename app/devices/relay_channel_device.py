@@ -1,4 +1,5 @@
 import logging
+import time
 from bisect import bisect_left
 from dataclasses import dataclass, field
 from datetime import datetime, date, timezone
@@ -58,6 +59,12 @@ SENSOR_CANONICAL_TYPES = {"thermo"}
 # Load canonical types — devices classified as loads appear in Current Loads.
 LOAD_CANONICAL_TYPES = {"switch", "pump", "multi_switch"}
 
+# Сколько секунд принятая облаком команда считается актуальной для
+# подавления повтора — один интервал опроса TuyaStatusUpdaterAsync (run.py).
+# Позже повтор уходит по-настоящему: ручное переключение ещё не увидено
+# опросом, или облако вовсе не присылает этот код в статусе.
+COMMAND_COALESCE_SECONDS = 120
+
 
 def normalize_device_type(raw: str) -> str:
     """Normalize a device_type string to its canonical form.
@@ -111,8 +118,8 @@ class RelayChannelDevice:
     inverter_is_on: bool = False
     inverter_voltage: float = 0.0
     state_key: str = None
-    last_switched: int = field(default_factory=lambda: int(datetime.now().timestamp()))
-    last_tick_ts: int = field(default_factory=lambda: int(datetime.now().timestamp()))
+    last_switched: int = field(default_factory=lambda: int(time.time()))
+    last_tick_ts: int = field(default_factory=lambda: int(time.time()))
     today_run_sec: int = 0
     today_for_date: date = field(default_factory=date.today)
     logger: logging.Logger = field(
@@ -123,6 +130,14 @@ class RelayChannelDevice:
     today_wh: float = 0.0
     enabled: bool = True
     communication_status: str = "unknown"
+    device_type_lc: str = field(init=False, repr=False, default="")
+    # производные от конфига значения — считаем один раз, читаем на каждом опросе
+    mode_code: str = field(init=False, repr=False, default="mode")
+    speed_code: str = field(init=False, repr=False, default="P")
+    speed_p: int | None = field(init=False, repr=False, default=None)  # status["P"] как int
+    # значение последней принятой облаком команды; None — неизвестно
+    last_command_value: Any = field(init=False, repr=False, default=None)
+    last_command_at: float = field(init=False, repr=False, default=0.0)  # monotonic
 
     @property
     def canonical_device_type(self) -> str:
@@ -130,6 +145,12 @@ class RelayChannelDevice:
         return normalize_device_type(self.device_type)
 
     def __post_init__(self):
+        # device_type в нижнем регистре — для сравнений в циклах управления
+        self.device_type_lc = self.device_type.lower()
+        extra = self.extra or {}
+        self.mode_code = extra.get("mode_code", "mode")
+        self.speed_code = extra.get("p_code", "P")
+
         #  ← если в YAML ещё лежит api_key / api_sw
         if not self.control_key and self.api_key:
             self.control_key = self.api_key
@@ -137,6 +158,8 @@ class RelayChannelDevice:
         if self.state_key is None:  # если не задан — читаем из control_key
             self.state_key = self.control_key
 
+        self._set_speed_p(self.status.get("P"))
+
 
     def get_min_volt(self) -> float:
         return float(self.min_volt)
@@ -145,7 +168,7 @@ class RelayChannelDevice:
         return float(self.max_volt)
 
     def can_switch(self) -> bool:
-        delta = int(datetime.now().timestamp()) - self.last_switched
+        delta = int(time.time()) - self.last_switched
         if delta < self.time_delay:
             self.logger.info(
                 "%s: cannot_switch wait=%ss",
@@ -199,9 +222,36 @@ class RelayChannelDevice:
 
     def update_status(self, new_status: Dict[str, Any]):
         self.status.update(new_status)
+        if "P" in new_status:
+            self._set_speed_p(new_status["P"])
+        # облако сообщило другое значение (ручное переключение, команда
+        # не применилась) — следующая команда должна уйти по-настоящему
+        cp = self.property_mapping.control_property
+        if cp in new_status and new_status[cp] != self.last_command_value:
+            self.last_command_value = None
+
+    def _set_speed_p(self, value: Any) -> None:
+        """Скорость насоса P приводим к int один раз — при записи статуса."""
+        if value is None:
+            return
+        try:
+            self.speed_p = int(value)
+        except (TypeError, ValueError):
+            pass  # мусор от облака — оставляем прошлое значение
+
+    def remember_command(self, value: Any) -> None:
+        """Запомнить значение, только что принятое облаком."""
+        self.last_command_value = value
+        self.last_command_at = time.monotonic()
+
+    def command_coalesced(self, value: Any) -> bool:
+        """True, если то же значение принято облаком меньше
+        COMMAND_COALESCE_SECONDS назад и статус его не опроверг."""
+        return (value == self.last_command_value
+                and time.monotonic() - self.last_command_at < COMMAND_COALESCE_SECONDS)
 
     def mark_switched(self):
-        self.last_switched = int(datetime.now().timestamp())
+        self.last_switched = int(time.time())
 
     def ready_to_switch_on(self, inverter_voltage: float) -> bool:
         if self.is_device_on():
@@ -223,17 +273,23 @@ class RelayChannelDevice:
             return False
         return inverter_voltage < self.min_volt
 
-    def extract_status(self, raw_status: list) -> Dict[str, Any]:
+    def extract_status(self, raw_status: list | dict) -> Dict[str, Any]:
         """Parse a Tuya raw_status list into a dict (backward compat).
 
+        Also accepts an already built ``{code: value}`` map, so callers
+        that index the status list once do not pay for a second scan.
+
         This method is preserved for existing callers.  New code should
         use update_observation_from_tuya() for the canonical path.
         """
-        parsed = {item['code']: item['value'] for item in raw_status}
+        if isinstance(raw_status, dict):
+            parsed = dict(raw_status)
+        else:
+            parsed = {item['code']: item['value'] for item in raw_status}
         parsed.setdefault('switch_1', int(parsed.get('Power', 0)))
         parsed.update({
             'status': int(parsed.get('switch_1', 0)),
-            't': int(datetime.now().timestamp()),
+            't': int(time.time()),
             'device_id': self.id,
             'success': True
         })
@@ -258,14 +314,14 @@ class RelayChannelDevice:
         if isinstance(value, bool):
             observed_bool = value
         elif isinstance(value, int):
-            if self.device_type.lower() == "pump":
+            if self.device_type_lc == "pump":
                 observed_bool = value > 0
             elif value == 1:
                 observed_bool = True
             elif value == 0:
                 observed_bool = False
         elif isinstance(value, float):
-            if self.device_type.lower() == "pump":
+            if self.device_type_lc == "pump":
                 observed_bool = value > 0.0
         elif isinstance(value, str):
             stripped = value.strip().lower()
@@ -273,7 +329,7 @@ class RelayChannelDevice:
                 observed_bool = True
             elif stripped in ("0", "false", "no", "off"):
                 observed_bool = False
-            elif self.device_type.lower() == "pump":
+            elif self.device_type_lc == "pump":
                 try:
                     observed_bool = float(stripped) > 0.0
                 except ValueError:
@@ -311,7 +367,7 @@ class RelayChannelDevice:
         """
         if not self.is_device_on():
             return 0
-        return int(datetime.now().timestamp()) - self.last_switched
+        return int(time.time()) - self.last_switched
 
 
     def uptime_str(self) -> str:
@@ -327,13 +383,13 @@ class RelayChannelDevice:
         Записывает в переданный logger аптайм этого устройства,
         пропуская аналоговые.
         """
-        if self.device_type.lower() in ANALOG_TYPES:
+        if self.device_type_lc in ANALOG_TYPES:
             return
         logger.info(f"{self.name}: uptime={self.uptime_str()}")
 
     # ───────── RelayChannelDevice ──────────────────────────────
     def power_consumption(self) -> float:
-        if self.device_type.lower() == "pump":
+        if self.device_type_lc == "pump":
             p = self.status.get("P")
             if isinstance(p, (int, float)):
                 return self._pump_w_from_p(p)
@@ -404,12 +460,12 @@ class RelayChannelDevice:
         self.mark_switched()
 
     def tuya_code_mode(self) -> str:
-        # вернёт либо то, что пришло в extra, либо 'mode'
-        return self.extra.get("mode_code", "mode")
+        # вернёт либо то, что пришло в extra, либо 'mode' (см. __post_init__)
+        return self.mode_code
 
     def tuya_code_speed(self) -> str:
-        # вернёт либо то, что пришло в extra, либо 'P'
-        return self.extra.get("p_code", "P")
+        # вернёт либо то, что пришло в extra, либо 'P' (см. __post_init__)
+        return self.speed_code
     # ------------------------------------------------------------ helpers
     def _reset_daily_counters_if_needed(self, ts: int):
         now_d = datetime.fromtimestamp(ts).date()
@@ -426,7 +482,7 @@ class RelayChannelDevice:
         •  Любое другое устройство → `load_in_wt` из YAML
           (если поле не задано — 0).
         """
-        if self.device_type.lower() == "pump":
+        if self.device_type_lc == "pump":
             p_val = self.status.get("P")
             if isinstance(p_val, (int, float)):
                 return self._pump_w_from_p(p_val)
@@ -457,7 +513,7 @@ class RelayChannelDevice:
             extra={
                 "evt": "energy_tick",
                 "dev": self.name,
-                "type": self.device_type.lower(),
+                "type": self.device_type_lc,
                 "wh": self.today_wh,
                 "run_sec": self.today_run_sec,  # Теперь видно в логе!
             },
@@ -8,6 +8,8 @@ class RelayDeviceManager:
     def __init__(self, power_limit: float = 10000):
         self._devices: Dict[str, RelayChannelDevice] = {}
         self._device_order: List[RelayChannelDevice] = []
+        self._by_type: Dict[str, List[RelayChannelDevice]] | None = None
+        self.revision = 0  # растёт при add/remove — для кэшей у потребителей
         self._power_limit = power_limit
         self.logger = logging.getLogger("RelayDeviceManager")
 
@@ -17,6 +19,8 @@ class RelayDeviceManager:
 
         self._devices[device.id] = device
         self._device_order.append(device)
+        self._by_type = None
+        self.revision += 1
 
     def remove_device(self, device: RelayChannelDevice):
         if device.id not in self._devices:
@@ -24,10 +28,25 @@ class RelayDeviceManager:
 
         del self._devices[device.id]
         self._device_order.remove(device)
+        self._by_type = None
+        self.revision += 1
 
     def get_devices(self) -> List[RelayChannelDevice]:
         return self._device_order
 
+    def get_by_type(self, device_type: str) -> List[RelayChannelDevice]:
+        """
+        Устройства заданного типа (в нижнем регистре).
+        Разбивка по типам строится одним проходом и живёт до add/remove/sort.
+        """
+        by_type = self._by_type
+        if by_type is None:
+            by_type = {}
+            for d in self._device_order:
+                by_type.setdefault(d.device_type_lc, []).append(d)
+            self._by_type = by_type
+        return by_type.get(device_type, [])
+
     def get_device_by_id(self, device_id: str) -> RelayChannelDevice:
         if device_id not in self._devices:
             raise ValueError(f"Device with ID '{device_id}' does not exist.")
@@ -60,6 +79,7 @@ class RelayDeviceManager:
 
     def sort_devices_by_priority(self):
         self._device_order.sort(key=lambda d: d.priority)
+        self._by_type = None
 
     def all_devices_on(self) -> List[RelayChannelDevice]:
         """Return devices where observation confirms ON.
@@ -1,36 +1,113 @@
 # app/logger.py
 
 import logging
+import queue
+import threading
 import time
+import weakref
 from logging import Handler, Logger
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from logfmter import Logfmter
 from concurrent_log_handler import ConcurrentRotatingFileHandler as RFH
 
+# Один фоновый поток на все CustomLogHandler. Handler'ы держим через WeakSet:
+# выброшенный handler собирается GC (файл закрывается в __del__), а поток
+# сам завершается, когда живых handler'ов не осталось.
+_flush_handlers = weakref.WeakSet()
+_flush_lock = threading.Lock()
+_flush_thread = None
+
+
+def _register_flush(handler) -> None:
+    global _flush_thread
+    with _flush_lock:
+        _flush_handlers.add(handler)
+        if _flush_thread is None:
+            _flush_thread = threading.Thread(target=_flush_loop, daemon=True,
+                                             name="log-flush")
+            _flush_thread.start()
+
+
+def _unregister_flush(handler) -> None:
+    with _flush_lock:
+        _flush_handlers.discard(handler)
+
+
+def _flush_registered() -> bool:
+    # сильные ссылки живут только внутри этого вызова, не во время сна
+    global _flush_thread
+    with _flush_lock:
+        handlers = list(_flush_handlers)
+        if not handlers:
+            _flush_thread = None
+            return False
+    for h in handlers:
+        h.flush()
+    return True
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(CustomLogHandler.FLUSH_INTERVAL)
+        if not _flush_registered():
+            return
+
+
 class CustomLogHandler(Handler):
     """
     Общий handler: печать в консоль + запись в файл.
     Имя канала пишется в квадратных скобках.
+    Файл буферизуется блоками, а не построчно: сбрасываем сразу на WARNING+,
+    а остальное — общим фоновым потоком каждые FLUSH_INTERVAL секунд (даже
+    если канал молчит) и при flush()/close(). При SIGKILL теряется не больше
+    последних FLUSH_INTERVAL секунд.
     """
 
+    FILE_BUFFER = 64 * 1024
+    FLUSH_INTERVAL = 5.0
+
     def __init__(self, path: Path, ch_name: str):
         super().__init__()
         self._file_path = path
         path.parent.mkdir(parents=True, exist_ok=True)
-        self._file = open(path, "a", buffering=1, encoding="utf-8")
+        self._file = open(path, "a", buffering=self.FILE_BUFFER, encoding="utf-8")
         self._ch_name = ch_name.upper()
+        # метка времени с точностью до секунды: форматируем раз в секунду
+        self._ts_sec = -1
+        self._ts_str = ""
+        _register_flush(self)
 
     def emit(self, record):
         msg = self.format(record)
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        sec = int(record.created)
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        ts = self._ts_str
         line = f"{ts} [{self._ch_name}] {msg}"
         print(line)
         self._file.write(line + "\n")
+        if record.levelno >= logging.WARNING:
+            self._file.flush()
+
+    def flush(self):
+        # под lock'ом handler'а: фоновый flush не пересекается с emit()
+        self.acquire()
+        try:
+            if hasattr(self, '_file') and self._file and not self._file.closed:
+                self._file.flush()
+        finally:
+            self.release()
 
     def close(self):
-        if hasattr(self, '_file') and self._file and not self._file.closed:
-            self._file.close()
+        _unregister_flush(self)
+        self.acquire()
+        try:
+            if hasattr(self, '_file') and self._file and not self._file.closed:
+                self._file.close()
+        finally:
+            self.release()
         super().close()
 
     def __del__(self):
@@ -186,4 +263,131 @@ def loki_handler() -> logging.Handler:
                             maxBytes=5*1024*1024, backupCount=3,
                             encoding="utf-8")
         _loki_handler.setFormatter(fmt)
-    return _loki_handler
\ No newline at end of file
+    return _loki_handler
+
+
+# Обработчики, которым можно писать пачку одним stream.write():
+# у них нет межпроцессных блокировок и своей логики открытия файла.
+_BATCH_WRITE_TYPES = (logging.FileHandler, RotatingFileHandler)
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener, который будит writer не на каждую запись, а пачкой.
+
+    ▸ ждёт первую запись (get с таймаутом 1 с);
+    ▸ добирает ещё до `batch_size` записей / `batch_bytes` байт,
+      но не дольше `flush_interval` секунд;
+    ▸ запись уровня `flush_level` и выше сбрасывает пачку сразу
+      (как flushLevel у MemoryHandler);
+    ▸ File/RotatingFileHandler получают один stream.write() + один flush(),
+      остальные (Loki RFH) — handle() по записи под одним acquire().
+    """
+
+    def __init__(
+            self,
+            q,
+            *handlers: Handler,
+            respect_handler_level: bool = False,
+            batch_size: int = 64,
+            batch_bytes: int = 5 * 1024 * 1024,
+            flush_interval: float = 1.0,
+            flush_level: int = logging.ERROR,
+    ):
+        super().__init__(q, *handlers, respect_handler_level=respect_handler_level)
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+
+    def _monitor(self) -> None:
+        q = self.queue
+        has_task_done = hasattr(q, "task_done")
+        stopping = False
+        while not stopping:
+            try:
+                record = q.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            batch: list[logging.LogRecord] = []
+            size = 0
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if record is self._sentinel:
+                    stopping = True
+                    if has_task_done:
+                        q.task_done()
+                    break
+                batch.append(record)
+                size += len(record.getMessage())
+                if (len(batch) >= self.batch_size or size >= self.batch_bytes
+                        or record.levelno >= self.flush_level):
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self.handle_batch(batch)
+                if has_task_done:
+                    for _ in batch:
+                        q.task_done()
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        records = [self.prepare(r) for r in records]
+        for handler in self.handlers:
+            if self.respect_handler_level:
+                recs = [r for r in records if r.levelno >= handler.level]
+            else:
+                recs = records
+            if not recs:
+                continue
+            if type(handler) in _BATCH_WRITE_TYPES:
+                self._write_batch(handler, recs)
+                continue
+            handler.acquire()
+            try:
+                for r in recs:
+                    handler.handle(r)
+            finally:
+                handler.release()
+
+    @staticmethod
+    def _write_batch(handler: logging.FileHandler,
+                     records: list[logging.LogRecord]) -> None:
+        handler.acquire()
+        try:
+            records = [r for r in records if handler.filter(r)]
+            if not records:
+                return
+            try:
+                if (isinstance(handler, RotatingFileHandler)
+                        and handler.shouldRollover(records[0])):
+                    handler.doRollover()
+                if handler.stream is None:
+                    handler.stream = handler._open()
+                handler.stream.write("".join(
+                    handler.format(r) + handler.terminator for r in records
+                ))
+                handler.flush()
+            except Exception:
+                handler.handleError(records[0])
+        finally:
+            handler.release()
+
+
+def queued_logger(name: str, q, level: int = logging.INFO) -> Logger:
+    """
+    Отдельный (не из logging.getLogger) логгер с именем `name`,
+    который только кладёт записи в очередь `q`.
+    Имя в записях сохраняется, общий логгер `name` не трогаем.
+    """
+    lg = Logger(name, level)
+    lg.addHandler(QueueHandler(q))
+    lg.propagate = False
+    return lg
@@ -16,6 +16,16 @@ import csv
 
 from shared_state.shared_state import shared_state
 
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        # orjson не экранирует не-ASCII — то же, что ensure_ascii=False
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
 
 # ============================ ВСПОМОГАТЕЛЬНОЕ ================================
 def _now_ts() -> int:
@@ -246,7 +256,7 @@ class SQLiteStorage:
             conn.close()
 
     def insert_point(self, point: MLDataPoint):
-        payload = json.dumps(point.to_dict(), ensure_ascii=False)
+        payload = _dumps(point.to_dict())
         conn = self._connect()
         try:
             conn.execute(
@@ -626,7 +636,7 @@ class MLDataCollector:
             return
         self.json_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.json_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(point.to_dict(), ensure_ascii=False) + '\n')
+            f.write(_dumps(point.to_dict()) + '\n')
             f.flush()
             os.fsync(f.fileno())
 
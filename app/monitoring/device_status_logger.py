@@ -76,10 +76,9 @@ class DeviceStatusLogger:
         rows: list[str] = []
 
         # ───────────────────── «шапка» с данными инвертора ──────────────────
-        inv_v   = shared_state.get("battery_voltage")   # None, если ещё нет
-        inv_mode= shared_state.get("working_mode")
-        pv_pow  = shared_state.get("pv_power")
-        load_pr = shared_state.get("load_percent")
+        # None, если ещё нет; одним захватом lock'а — значения из одного сэмпла
+        inv_v, inv_mode, pv_pow, load_pr = shared_state.snapshot(
+            "battery_voltage", "working_mode", "pv_power", "load_percent")
 
         head_parts: list[str] = []
         if inv_v      is not None: head_parts.append(f"Batt {inv_v:.1f} V")
@@ -92,7 +91,7 @@ class DeviceStatusLogger:
 
         # ───────────────────── перечень устройств ──────────────────────────
         for d in sorted(devices, key=lambda x: x.priority):
-            dtype  = d.device_type.lower()
+            dtype  = d.device_type_lc
             energy = f"{d.today_kwh:.2f} kWh"
 
             # ---- дискретные (реле / насос) --------------------------------
@@ -129,7 +128,7 @@ class DeviceStatusLogger:
         now_ts = int(datetime.now().timestamp())
 
         for d in devices:
-            if d.device_type.lower() in self.ANALOG_TYPES:
+            if d.device_type_lc in self.ANALOG_TYPES:
                 continue
             uptime = now_ts - d.last_switched
             energy = d.today_kwh
@@ -151,7 +150,7 @@ class DeviceStatusLogger:
     # ───────────────────────── детали + алармы ──────────────────────────
     def log_device_details(self, devices: Sequence[RelayChannelDevice]) -> None:
         for d in devices:
-            dtype = d.device_type.lower()
+            dtype = d.device_type_lc
 
             if dtype == "pump":
                 self._handle_pump(d)
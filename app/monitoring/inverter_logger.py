@@ -1,6 +1,9 @@
-from app.logger import add_file_logger, get_loki_logger
+from app.logger import (
+    BatchingQueueListener, add_file_logger, get_loki_logger, queued_logger,
+)
 from pathlib import Path
 import logging
+import queue
 from app.api import DeviceData
 
 class InverterLogger:
@@ -10,17 +13,18 @@ class InverterLogger:
         """
         ▸ гарантируем, что *хотя бы один* Rotating-file-handler
           ссылается на logs/inverter.log, даже если логгер существовал раньше.
-        ▸ Loki-handler добавляем отдельно и *только* во время log().
+        ▸ запись в файл и в Loki идёт через очереди: BatchingQueueListener
+          сбрасывает их пачками в фоновом потоке, log() не ждёт диска.
         """
-        self._logger = logging.getLogger("Inverter")
-        self._logger.setLevel(logging.INFO)
-        self._logger.propagate = False
+        inverter = logging.getLogger("Inverter")
+        inverter.setLevel(logging.INFO)
+        inverter.propagate = False
 
         # ── file-handler, если его ещё нет ──────────────────────────
         if not any(
             isinstance(h, logging.handlers.RotatingFileHandler)
             and Path(h.baseFilename) == self.LOG_PATH
-            for h in self._logger.handlers
+            for h in inverter.handlers
         ):
             add_file_logger(               # создаст и добавит handler
                 name="Inverter",
@@ -29,27 +33,71 @@ class InverterLogger:
                 fmt="%(asctime)s %(levelname)s: %(message)s",
             )
 
+        # ── очереди: file и Loki пишутся разными handler'ами ────────
+        loki = get_loki_logger()
+        file_q: queue.SimpleQueue = queue.SimpleQueue()
+        loki_q: queue.SimpleQueue = queue.SimpleQueue()
+        # respect_handler_level: уровни file/Loki handler'ов действуют и здесь
+        self._listeners = [
+            BatchingQueueListener(file_q, *inverter.handlers,
+                                  respect_handler_level=True),
+            BatchingQueueListener(loki_q, *loki.handlers,
+                                  respect_handler_level=True),
+        ]
+        for listener in self._listeners:
+            listener.start()
+
+        self._logger = queued_logger("Inverter", file_q)
+        self._loki = queued_logger("LOKI", loki_q, level=loki.level)
+
     # ────────────────────────────────────────────────────────────────
-    def log(self, dd: DeviceData) -> None:
-        if not isinstance(dd, DeviceData):
-            self._logger.warning("InverterLogger: получили не DeviceData: %s", dd)
-            return
+    def log(self, dd: DeviceData, summary: str | None = None) -> None:
+        """
+        `summary` — уже посчитанный dd.summary() этого сэмпла
+        (InverterMonitor строит его один раз и для shared_state).
+        """
+        assert isinstance(dd, DeviceData), dd      # снимается под python -O
 
         # 1. многострочный блок для людей
-        self._logger.info("\n" + dd.summary())
+        if summary is None:
+            summary = dd.summary()
+        self._logger.info("\n%s", summary)
 
-        # 2. однострочная метрика для Loki
-        loki = get_loki_logger()
-        loki.info(
-            "inverter_metrics",
-            extra={
-                "type":      "inverter",
-                "ts":        dd.timestamp,
-                "mode":      dd.working_state,
-                "batt_v":    dd.battery_voltage,
-                "batt_pct":  dd.battery_capacity,
-                "pv_w":      dd.pv_total_power,
-                "out_w":     dd.output_power,
-                "load_pct":  dd.ac_output_load,
-            },
-        )
+        # 2. однострочная метрика для Loki (dict строим, только если пишем)
+        if self._loki.isEnabledFor(logging.INFO):
+            self._loki.info(
+                "inverter_metrics",
+                extra={
+                    "type":      "inverter",
+                    "ts":        dd.timestamp,
+                    "mode":      dd.working_state,
+                    "batt_v":    dd.battery_voltage,
+                    "batt_pct":  dd.battery_capacity,
+                    "pv_w":      dd.pv_total_power,
+                    "out_w":     dd.output_power,
+                    "load_pct":  dd.ac_output_load,
+                },
+            )
+
+    def close(self) -> None:
+        """Сбросить накопленные записи и остановить фоновые потоки."""
+        global _INSTANCE
+        listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            listener.stop()
+        if _INSTANCE is self:
+            _INSTANCE = None       # следующий get_inverter_logger() соберёт заново
+
+
+_INSTANCE: InverterLogger | None = None
+
+
+def get_inverter_logger() -> InverterLogger:
+    """
+    Один InverterLogger на процесс: поиск/добавление handler'ов и запуск
+    фоновых listener'ов выполняются только при первом вызове.
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        _INSTANCE = InverterLogger()
+    return _INSTANCE
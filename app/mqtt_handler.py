@@ -1,4 +1,9 @@
-import json
+import functools
+import logging
+import queue
+import socket
+import threading
+import time
 
 try:
     import paho.mqtt.client as mqtt
@@ -6,35 +11,146 @@ try:
 except ImportError:
     mqtt_available = False
 
+try:
+    import orjson
+
+    def _dumps(data) -> bytes:
+        return orjson.dumps(data)
+except ImportError:
+    import json
+
+    def _dumps(data) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+logger = logging.getLogger("MqttHandler")
+
+
+def _set_nodelay(client, userdata, sock):
+    """on_socket_open: мелкие publish не ждут Nagle-склейки (до ~40 мс)."""
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (AttributeError, OSError):
+        pass  # websocket-обёртка / не TCP — оставляем как есть
+
+
+_STOP = object()  # sentinel для фонового потока публикации
+
+
 class MqttHandler:
     _client = None
+    _handler = None
+    QUEUE_MAXSIZE = 10_000
 
     def __init__(self, config):
         if not mqtt_available:
             raise RuntimeError("MQTT библиотека paho-mqtt не установлена")
 
         self.topic = config.mqtt_topic
+        self._batch_s = max(0, config.mqtt_batch_ms) / 1000
+        self._batch_max = max(1, config.mqtt_batch_max)
         self.client = mqtt.Client(client_id="dessmonitor_logger_py")
         if config.mqtt_user:
             self.client.username_pw_set(config.mqtt_user, config.mqtt_pass)
+        # mqtt.max_queued > 0: paho отбрасывает сверх лимита (0 — без предела)
+        self.client.max_queued_messages_set(config.mqtt_max_queued)
+        self.client.on_socket_open = _set_nodelay   # до connect(): и на реконнектах
         try:
             self.client.connect(config.mqtt_host, config.mqtt_port, keepalive=60)
             self.client.loop_start()
             MqttHandler._client = self.client
-            print(f"[INFO] Подключены к MQTT-брокеру {config.mqtt_host}:{config.mqtt_port}, топик='{self.topic}'")
+            logger.info("Подключены к MQTT-брокеру %s:%s, топик='%s'",
+                        config.mqtt_host, config.mqtt_port, self.topic)
         except Exception as e:
             raise RuntimeError(f"Ошибка подключения к MQTT: {e}")
 
+        # топик/qos/retain неизменны — связываем один раз, а не на каждый publish
+        self._publish = functools.partial(
+            self.client.publish, self.topic, qos=0, retain=config.mqtt_retain
+        )
+
+        # сериализация и publish — в фоновом потоке, не в потоке опроса
+        self._q: queue.Queue = queue.Queue(maxsize=self.QUEUE_MAXSIZE)
+        self._dropped = 0
+        self._failed = 0
+        self._worker = threading.Thread(
+            target=self._drain, name="mqtt-publish", daemon=True
+        )
+        self._worker.start()
+        MqttHandler._handler = self
+
     def publish(self, data):
+        """
+        Не блокирует вызывающего: кладёт сэмпл в очередь.
+        При переполнении выбрасываем самый старый — свежие данные важнее.
+        """
+        while True:
+            try:
+                self._q.put_nowait(data)
+                return
+            except queue.Full:
+                try:
+                    self._q.get_nowait()
+                except queue.Empty:
+                    continue
+                # брокер не успевает: пишем на первом и каждом 1000-м сбросе
+                self._dropped += 1
+                if self._dropped % 1000 == 1:
+                    logger.warning("MQTT очередь переполнена, отброшено сэмплов: %d",
+                                   self._dropped)
+
+    def _drain(self):
+        while True:
+            data = self._q.get()
+            if data is _STOP:
+                return
+            if self._batch_max == 1:
+                self._send(data)
+                continue
+
+            # копим до batch_max сэмплов или batch_ms, шлём одним массивом
+            batch = [data]
+            deadline = time.monotonic() + self._batch_s
+            stopping = False
+            while len(batch) < self._batch_max:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._send(batch)
+            if stopping:
+                return
+
+    def _send(self, obj):
         try:
-            payload = json.dumps(data)
-            self.client.publish(self.topic, payload, qos=0, retain=False)
+            info = self._publish(_dumps(obj))   # bytes — paho не перекодирует
         except Exception as e:
-            print(f"⚠ Ошибка публикации MQTT: {e}")
+            logger.warning("Ошибка публикации MQTT: %s", e)
+            return
+        # paho сообщает о неудаче кодом rc, а не исключением (нет связи,
+        # очередь max_queued полна); пишем на первом и каждом 100-м отказе
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            self._failed += 1
+            if self._failed % 100 == 1:
+                logger.warning("MQTT publish отклонён (rc=%s), всего отказов: %d",
+                               info.rc, self._failed)
+
+    def _stop_worker(self):
+        self.publish(_STOP)
+        self._worker.join(timeout=5)
 
     @staticmethod
     def cleanup():
+        if MqttHandler._handler:
+            MqttHandler._handler._stop_worker()   # дописать очередь
+            MqttHandler._handler = None
         if MqttHandler._client:
             MqttHandler._client.loop_stop()
             MqttHandler._client.disconnect()
-            MqttHandler._client = None
\ No newline at end of file
+            MqttHandler._client = None
@@ -93,9 +93,12 @@ class OverloadProtector:
 
     async def _check_once(self) -> None:
         now = time.time()
-        dis  = shared_state.get("battery_current_dis") or 0.0
-        pwr  = shared_state.get("output_power") or shared_state.get("output_apparent_power") or 0.0
-        mode = (shared_state.get("working_mode") or "").upper()
+        dis, pwr, apparent, mode = shared_state.snapshot(
+            "battery_current_dis", "output_power", "output_apparent_power",
+            "working_mode_uc")
+        dis  = dis or 0.0
+        pwr  = pwr or apparent or 0.0
+        mode = mode or ""
 
         # Only protect in Invert Mode — grid mode has no battery risk
         if "INVERT" not in mode:
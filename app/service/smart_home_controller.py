@@ -1,13 +1,17 @@
 # app/logic/smart_home_controller.py
 import asyncio
+import heapq
 import logging
+import queue
 from enum import IntEnum
 from pathlib import Path
 
 from app.devices.pond_pump_controller import PondPumpController
 from app.devices.pump_power_map import PRESET_DESCR
 from app.devices.relay_device_manager import RelayDeviceManager
-from app.logger import add_file_logger, loki_handler
+from app.logger import (
+    BatchingQueueListener, add_file_logger, loki_handler, queued_logger,
+)
 from app.tuya.relay_tuya_controller import RelayTuyaController
 from app.utils.time_utils import night_multiplier
 from shared_state.shared_state import shared_state
@@ -22,6 +26,11 @@ class PumpPreset(IntEnum):
     AUTO = 6  # штатный «Manual»-режим
 
 
+# ручные пресеты: реле-логика и автоподстройка насоса выключены.
+# IntEnum хэшируется как int → проверяем сырое значение без PumpPreset(...)
+_MANUAL_PRESETS = frozenset({PumpPreset.STRICT, PumpPreset.SUMMER, PumpPreset.WINTER})
+
+
 class SmartHomeController:
     LOG_BUSINESS_PATH = Path("logs/business_decisions.log")
     AC_MODE = "LINE MODE"
@@ -43,27 +52,40 @@ class SmartHomeController:
         self.pump_automation_enabled = pump_automation_enabled
         self._reset_coordinator = startup_reset_coordinator
 
-        self.log_business = add_file_logger("BusinessDecisions",
-                                            self.LOG_BUSINESS_PATH,
-                                            level=logging.INFO
-                                            )
+        business = add_file_logger("BusinessDecisions",
+                                   self.LOG_BUSINESS_PATH,
+                                   level=logging.INFO
+                                   )
 
         lh = loki_handler()  # глобальный handler из logger.py
-        if lh not in self.log_business.handlers:
-            self.log_business.addHandler(lh)
+        if lh not in business.handlers:
+            business.addHandler(lh)
+
+        # файл и Loki пишет фоновый listener — event loop не ждёт write().
+        # Решения редкие: копим до 256 записей / 5 с, ERROR — сразу на диск
+        log_q: queue.SimpleQueue = queue.SimpleQueue()
+        self._log_listener = BatchingQueueListener(
+            log_q, *business.handlers, respect_handler_level=True,
+            batch_size=256, flush_interval=5.0, flush_level=logging.ERROR)
+        self._log_listener.start()
+        self.log_business = queued_logger("BusinessDecisions", log_q)
         self.pump_logic = PondPumpController()
         self._stop = asyncio.Event()
         self._tasks: list[asyncio.Task] = []
         self._last_preset_logged: int or None = None
         self._last_switch_preset: int or None = None
+        # один snapshot shared_state на версию — общий для switch- и pump-тика
+        self._snap: dict = {}
+        self._snap_v: int | None = None
 
     # ------------------------------------------------------------------
     def start(self) -> None:
         loop = asyncio.get_running_loop()
         self._stop.clear()
-        self._tasks.append(loop.create_task(self._switch_loop()))
+        jobs = [(self.switch_int, self._switch_tick)]
         if self.pump_automation_enabled:
-            self._tasks.append(loop.create_task(self._pump_loop()))
+            jobs.append((self.pump_int, self._pump_tick))
+        self._tasks.append(loop.create_task(self._run(jobs)))
 
     async def stop(self) -> None:
         self._stop.set()
@@ -71,144 +93,214 @@ class SmartHomeController:
             t.cancel()
         await asyncio.gather(*self._tasks, return_exceptions=True)
         self._tasks.clear()
+        listener, self._log_listener = self._log_listener, None
+        if listener is not None:
+            listener.stop()  # дописать очередь на диск
 
     # ───────────────────── helpers ───────────────────────────────────
-    async def _sleep(self, base: int) -> None:
+    async def _run(self, jobs) -> None:
         """
-        Унифицированная пауза: ночью (22-07) умножаем `base` на 5.
-        Прерываемся мгновенно, если `self._stop.set()`.
+        Единый планировщик: min-heap из (deadline, idx, base, tick).
+        Один таймер и одна точка отмены на все периодические задачи.
+        Наступивший тик идёт отдельной Task, так что долгий switch_batch
+        одной задачи не сдвигает другую. Следующий запуск — через `base`
+        после окончания тика, ночью (22-07) `base` умножаем на 5.
         """
-        delay = base * night_multiplier()  # 1 днём / 5 ночью
-        try:
-            await asyncio.wait_for(self._stop.wait(), timeout=delay)
-        except asyncio.TimeoutError:
-            pass  # обычный переход к новой итерации
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        heap = [(now, i, base, tick) for i, (base, tick) in enumerate(jobs)]
+        heapq.heapify(heap)
+        running: set[asyncio.Task] = set()
+        # тик вернулся в heap — его новый deadline может быть раньше текущего
+        wake = asyncio.Event()
 
-    # ───────────────────── SWITСH-цикл ───────────────────────────────
-    async def _switch_loop(self) -> None:
-        while not self._stop.is_set():
+        async def _job(i, base, tick):
             try:
-                # --- 0a. STARTUP RESET GATE check ---
-                if (self._reset_coordinator is not None
-                        and not self._reset_coordinator.is_gate_open):
-                    self.log_business.info(
-                        "[SWITCH] Startup reset gate closed — skipping switch decisions",
-                        extra={"evt": "gate_closed"},
-                    )
-                    await self._sleep(self.switch_int)
-                    continue
+                await tick()
+            finally:
+                delay = base * night_multiplier()  # 1 днём / 5 ночью
+                heapq.heappush(heap, (loop.time() + delay, i, base, tick))
+                wake.set()
 
-                # --- 0b. проверка пресета насоса ----------------------
-                preset_val = int(shared_state.get("pump_mode", 6))
-                preset = PumpPreset(preset_val)
-                if preset in (PumpPreset.STRICT, PumpPreset.SUMMER, PumpPreset.WINTER):
-                    if preset_val != self._last_switch_preset:
-                        self.log_business.info(
-                            f"[SWITCH] preset={preset.name} → реле-логика выключена")
-                        self._last_switch_preset = preset_val
-                    await self._sleep(self.switch_int)
+        # ожидатели живут, пока не сработают: asyncio.wait с timeout
+        # не бросает TimeoutError и не создаёт новую Task на каждое ожидание
+        stop_waiter = loop.create_task(self._stop.wait())
+        wake_waiter = loop.create_task(wake.wait())
+        try:
+            while not self._stop.is_set():
+                if wake_waiter.done():
+                    wake.clear()
+                    wake_waiter = loop.create_task(wake.wait())
+                # пустой heap — все тики в работе, ждём окончания любого
+                delay = heap[0][0] - loop.time() if heap else None
+                if delay is None or delay > 0:
+                    await asyncio.wait((stop_waiter, wake_waiter), timeout=delay,
+                                       return_when=asyncio.FIRST_COMPLETED)
                     continue
+                _, i, base, tick = heapq.heappop(heap)
+                task = loop.create_task(_job(i, base, tick))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            stop_waiter.cancel()
+            wake_waiter.cancel()
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
 
-                # --- 1. основная логика -----------------------------
-                vbat = float(shared_state.get("battery_voltage", 0.0))
-                mode = (shared_state.get("working_mode") or "").upper()
-                on_ac = mode == self.AC_MODE
+    def _snapshot(self, version: int) -> dict:
+        """Копия shared_state; тики одной версии не копируют её повторно."""
+        if version != self._snap_v:
+            self._snap = shared_state.snapshot()
+            self._snap_v = version
+        return self._snap
 
-                switches = [d for d in self.dev_mgr.get_devices()
-                            if d.device_type.lower() == "switch"]
+    # ───────────────────── SWITCH-тик ────────────────────────────────
+    async def _switch_tick(self) -> None:
+        try:
+            # --- 0a. STARTUP RESET GATE check ---
+            if (self._reset_coordinator is not None
+                    and not self._reset_coordinator.is_gate_open):
+                self.log_business.info(
+                    "[SWITCH] Startup reset gate closed — skipping switch decisions",
+                    extra={"evt": "gate_closed"},
+                )
+                return
 
-                # 1-A. питаемся от сети → все реле OFF
-                if on_ac:
-                    for dev in switches:
-                        if dev.observation.is_on and self.ctrl.switch_off_device(dev):
-                            self.log_business.info(f"[OFF] {dev.name} — AC-grid")
-                    await self._sleep(self.switch_int)
-                    continue
+            # --- 0b. проверка пресета насоса ----------------------
+            # тик не пропускаем даже при неизменном shared_state: решение
+            # зависит и от observation устройств (Tuya-апдейтер, ручное
+            # переключение) и от повтора после неудачного switch_batch
+            snap = self._snapshot(shared_state.version)
+            preset_val = int(snap.get("pump_mode", 6))
+            if preset_val in _MANUAL_PRESETS:
+                if preset_val != self._last_switch_preset:
+                    self.log_business.info(
+                        "[SWITCH] preset=%s → реле-логика выключена",
+                        PumpPreset(preset_val).name)
+                    self._last_switch_preset = preset_val
+                return
 
-                # 1-B. питаемся от АКБ → мягкая логика
-                for dev in switches:
-                    obs = dev.observation
-                    # Skip devices with UNKNOWN or stale observation
-                    if obs.is_unknown:
-                        self.log_business.info(
-                            f"[SKIP] {dev.name} — observation UNKNOWN, skipping switch decision",
-                            extra={"evt": "automation_skip", "dev": dev.name,
-                                   "obs_state": "unknown", "freshness": "unavailable"},
-                        )
-                        continue
-                    freshness_val = obs.freshness if hasattr(obs, 'freshness') else None
-                    if freshness_val is None:
-                        from app.devices.device_observation import compute_freshness
-                        freshness_val = compute_freshness(obs)
-                    if freshness_val is not None and hasattr(freshness_val, 'value'):
-                        fresh_str = freshness_val.value
-                    else:
-                        fresh_str = str(freshness_val) if freshness_val else "unknown"
-                    from app.devices.device_observation import ObservationFreshness
-                    if freshness_val == ObservationFreshness.STALE or freshness_val == ObservationFreshness.UNAVAILABLE:
-                        self.log_business.info(
-                            f"[SKIP] {dev.name} — observation {fresh_str}, skipping switch decision",
-                            extra={"evt": "automation_skip", "dev": dev.name,
-                                   "obs_state": obs.observed_state.value if hasattr(obs.observed_state, 'value') else str(obs.observed_state),
-                                   "freshness": fresh_str},
-                        )
-                        continue
-                    if vbat >= dev.max_volt and not obs.is_on:
-                        if self.ctrl.switch_on_device(dev):
-                            self.log_business.info(
-                                f"[ON ] {dev.name} — Vbat={vbat:.2f} ≥ {dev.max_volt}")
-                    elif vbat <= dev.min_volt and obs.is_on:
-                        if self.ctrl.switch_off_device(dev):
-                            self.log_business.info(
-                                f"[OFF] {dev.name} — Vbat={vbat:.2f} ≤ {dev.min_volt}")
-
-            except Exception as exc:
-                self.log_business.error(f"switch_loop error: {exc}", exc_info=True)
-
-            await self._sleep(self.switch_int)
-
-    # ───────────────────── PUMP-цикл ─────────────────────────────────
-    async def _pump_loop(self) -> None:
-        while not self._stop.is_set():
-            try:
-                volt = shared_state.get("battery_voltage", 20)
-                mode = (shared_state.get("working_mode") or "").upper()
-                inv_on = mode != self.AC_MODE
+            # --- 1. основная логика -----------------------------
+            vbat = float(snap.get("battery_voltage", 0.0))
+            mode = snap.get("working_mode_uc") or ""
+            on_ac = mode == self.AC_MODE
 
-                preset_val = int(shared_state.get("pump_mode", 6))
-                preset = PumpPreset(preset_val)
+            switches = self.dev_mgr.get_by_type("switch")
 
-                if preset_val != self._last_preset_logged:
-                    self.log_business.info(
-                        f"[PUMP] preset={preset.name} — {PRESET_DESCR.get(preset_val, '')}")
-                    self._last_preset_logged = preset_val
+            # 1-A. питаемся от сети → все реле OFF
+            if on_ac:
+                off = [dev for dev in switches if dev.observation.is_on]
+                if off:
+                    done = await asyncio.to_thread(
+                        self.ctrl.switch_batch, [(dev, False) for dev in off])
+                    for dev in off:
+                        if done.get(dev.id):
+                            self.log_business.info("[OFF] %s — AC-grid", dev.name)
+                return
 
-                # ручные пресеты – просто пауза
-                if preset in (PumpPreset.STRICT, PumpPreset.SUMMER, PumpPreset.WINTER):
-                    await self._sleep(self.pump_int)
+            # 1-B. питаемся от АКБ → мягкая логика
+            # решения копим и шлём одним switch_batch (запрос на Tuya-родителя)
+            on_list, off_list = [], []
+            for dev in switches:
+                obs = dev.observation
+                # Skip devices with UNKNOWN or stale observation
+                if obs.is_unknown:
+                    self.log_business.info(
+                        "[SKIP] %s — observation UNKNOWN, skipping switch decision",
+                        dev.name,
+                        extra={"evt": "automation_skip", "dev": dev.name,
+                               "obs_state": "unknown", "freshness": "unavailable"},
+                    )
+                    continue
+                freshness_val = obs.freshness if hasattr(obs, 'freshness') else None
+                if freshness_val is None:
+                    from app.devices.device_observation import compute_freshness
+                    freshness_val = compute_freshness(obs)
+                if freshness_val is not None and hasattr(freshness_val, 'value'):
+                    fresh_str = freshness_val.value
+                else:
+                    fresh_str = str(freshness_val) if freshness_val else "unknown"
+                from app.devices.device_observation import ObservationFreshness
+                if freshness_val == ObservationFreshness.STALE or freshness_val == ObservationFreshness.UNAVAILABLE:
+                    self.log_business.info(
+                        "[SKIP] %s — observation %s, skipping switch decision",
+                        dev.name, fresh_str,
+                        extra={"evt": "automation_skip", "dev": dev.name,
+                               "obs_state": obs.observed_state.value if hasattr(obs.observed_state, 'value') else str(obs.observed_state),
+                               "freshness": fresh_str},
+                    )
                     continue
+                if vbat >= dev.max_volt and not obs.is_on:
+                    on_list.append(dev)
+                elif vbat <= dev.min_volt and obs.is_on:
+                    off_list.append(dev)
 
-                # AUTO-preset
-                for pump in (d for d in self.dev_mgr.get_devices()
-                             if d.device_type.lower() == "pump"):
+            if not (on_list or off_list):
+                return
+            # Tuya-запрос блокирующий — в поток, чтобы не держать event loop
+            done = await asyncio.to_thread(
+                self.ctrl.switch_batch,
+                [(dev, True) for dev in on_list] + [(dev, False) for dev in off_list])
+            for dev in on_list:
+                if done.get(dev.id):
+                    self.log_business.info(
+                        "[ON ] %s — Vbat=%.2f ≥ %s", dev.name, vbat, dev.max_volt)
+            for dev in off_list:
+                if done.get(dev.id):
+                    self.log_business.info(
+                        "[OFF] %s — Vbat=%.2f ≤ %s", dev.name, vbat, dev.min_volt)
 
-                    target = await self.pump_logic.deside_speed(pump, volt, inv_on)
-                    if target is None or not pump.can_switch():
-                        continue
+        except Exception as exc:
+            self.log_business.error("switch_loop error: %s", exc, exc_info=True)
+
+    # ───────────────────── PUMP-тик ──────────────────────────────────
+    async def _pump_tick(self) -> None:
+        try:
+            # без пропуска по версии: can_switch() (кулдаун) и состояние
+            # насоса живут вне shared_state
+            snap = self._snapshot(shared_state.version)
+            volt = snap.get("battery_voltage", 20)
+            mode = snap.get("working_mode_uc") or ""
+            inv_on = mode != self.AC_MODE
 
-                    cur = int(pump.status.get("P", 20))
-                    if target == cur:
-                        continue
+            preset_val = int(snap.get("pump_mode", 6))
 
-                    if self.ctrl.set_numeric(pump, target):
-                        pump.update_status({"P": target})
-                        pump.mark_switched()
-                        direction = "↑" if target > cur else "↓"
-                        self.log_business.info(
-                            f"[PUMP] {pump.name}: {cur} → {target} {direction} | "
-                            f"Vbat={volt:.2f} | inverter_on={inv_on}")
+            if preset_val != self._last_preset_logged:
+                self.log_business.info(
+                    "[PUMP] preset=%s — %s",
+                    PumpPreset(preset_val).name, PRESET_DESCR.get(preset_val, ''))
+                self._last_preset_logged = preset_val
 
-            except Exception as exc:
-                self.log_business.error(f"pump_loop error: {exc}", exc_info=True)
+            # ручные пресеты – просто пауза
+            if preset_val in _MANUAL_PRESETS:
+                return
+
+            # AUTO-preset: новые скорости копим, шлём одним switch_batch
+            changes = []
+            for pump in self.dev_mgr.get_by_type("pump"):
+
+                target = await self.pump_logic.deside_speed(pump, volt, inv_on)
+                if target is None or not pump.can_switch():
+                    continue
+
+                cur = pump.speed_p if pump.speed_p is not None else 20
+                if target == cur:
+                    continue
+                changes.append((pump, cur, target))
+
+            if not changes:
+                return
+            done = await asyncio.to_thread(
+                self.ctrl.switch_batch,
+                [(pump, target) for pump, _, target in changes])
+            for pump, cur, target in changes:
+                if done.get(pump.id):
+                    pump.update_status({"P": target})
+                    direction = "↑" if target > cur else "↓"
+                    self.log_business.info(
+                        "[PUMP] %s: %s → %s %s | Vbat=%.2f | inverter_on=%s",
+                        pump.name, cur, target, direction, volt, inv_on)
 
-            await self._sleep(self.pump_int)
+        except Exception as exc:
+            self.log_business.error("pump_loop error: %s", exc, exc_info=True)
@@ -1,11 +1,22 @@
-import json
 import logging
 import os
 import time
-import urllib.request
+
+import requests
 
 from app.api import DeviceData
 
+try:
+    import orjson
+
+    def _loads(raw: bytes):
+        return orjson.loads(raw)          # bytes напрямую, без decode()
+except ImportError:
+    import json
+
+    def _loads(raw: bytes):
+        return json.loads(raw)
+
 
 class DessWebScraper:
     TITLE_MAPPING = {
@@ -33,10 +44,27 @@ class DessWebScraper:
         "Output Source Priority": "output_priority",
     }
 
+    # строковые поля — кладём как есть, остальные приводим к float
+    STRING_FIELDS = frozenset({
+        "working_state", "battery_status", "pv_status",
+        "mains_status", "load_status", "charger_priority", "output_priority",
+    })
+
+    # title → (поле DeviceData, строковое ли) — один lookup на элемент
+    FIELD_TABLE: dict[str, tuple[str, bool]] = {}
+    for _title, _field in TITLE_MAPPING.items():
+        FIELD_TABLE[_title] = (_field, _field in STRING_FIELDS)
+    del _title, _field
+
     def __init__(self, url_path: str = "web_fallback_url.txt" ):
         self.url_path = url_path
         self.logger = logging.getLogger(__name__)
         self.url = self._load_url()
+        # одна сессия на все опросы: keep-alive, без TCP/TLS-рукопожатия каждый раз
+        self._session = requests.Session()
+
+    def close(self) -> None:
+        self._session.close()
 
     def _load_url(self) -> str:
         if not os.path.exists(self.url_path):
@@ -50,9 +78,9 @@ class DessWebScraper:
     def fetch_data(self) -> DeviceData:
         self.logger.log(f"[WEB] Запрос по полному URL: {self.url}")
         try:
-            with urllib.request.urlopen(self.url, timeout=35) as response:
-                raw = response.read().decode("utf-8")
-                payload = json.loads(raw)
+            response = self._session.get(self.url, timeout=35)
+            response.raise_for_status()
+            payload = _loads(response.content)
         except Exception as e:
             self.logger.error(f"[WEB] Ошибка при веб-запросе: {e}")
             raise
@@ -64,20 +92,17 @@ class DessWebScraper:
         timestamp = dat.get("gts", time.strftime("%Y-%m-%d %H:%M:%S"))
         dd = DeviceData(timestamp=timestamp)
 
+        field_table = self.FIELD_TABLE
         sections = dat.get("pars", {})
         for group in sections.values():
             for item in group:
-                title = item.get("par")
-                val = item.get("val")
-                field = self.TITLE_MAPPING.get(title)
-
-                if not field:
+                entry = field_table.get(item.get("par"))
+                if entry is None:
                     continue
 
-                if field in {
-                    "working_state", "battery_status", "pv_status",
-                    "mains_status", "load_status", "charger_priority", "output_priority"
-                }:
+                field, is_str = entry
+                val = item.get("val")
+                if is_str:
                     setattr(dd, field, val)
                 else:
                     try:
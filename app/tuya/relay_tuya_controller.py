@@ -26,16 +26,16 @@ class RelayTuyaController:
 
     # ---------- canonical internal command path ----------
 
-    def _submit_command(
-        self, device: RelayChannelDevice, value: Any
-    ) -> CommandResult:
-        """Submit a command to Tuya using the canonical property mapping."""
+    def _control_property(
+        self, device: RelayChannelDevice
+    ) -> tuple[str | None, CommandResult | None]:
+        """Resolve the command property, or the refusal if none is usable."""
         if not device.enabled:
             self.logger.debug(
                 "[Tuya] %s: device disabled — refusing command", device.name,
                 extra={"evt": "cmd_disabled", "dev": device.name},
             )
-            return CommandResult(
+            return None, CommandResult(
                 success=False, accepted=False, error="device-disabled",
             )
 
@@ -45,7 +45,7 @@ class RelayTuyaController:
                 "[Tuya] %s: not command capable", device.name,
                 extra={"evt": "cmd_skip", "dev": device.name},
             )
-            return CommandResult.not_capable()
+            return None, CommandResult.not_capable()
 
         cp = mapping.control_property
         if not cp:
@@ -53,19 +53,34 @@ class RelayTuyaController:
                 "[Tuya] %s: missing control property", device.name,
                 extra={"evt": "cmd_no_prop", "dev": device.name},
             )
-            return CommandResult.not_capable()
+            return None, CommandResult.not_capable()
+        return cp, None
+
+    def _submit_command(
+        self, device: RelayChannelDevice, value: Any
+    ) -> CommandResult:
+        """Submit a command to Tuya using the canonical property mapping."""
+        cp, refused = self._control_property(device)
+        if refused is not None:
+            return refused
 
-        cmd = {
-            "devId": device.tuya_device_id,
-            "commands": [{"code": cp, "value": value}],
-        }
+        # то же значение недавно принято облаком и не опровергнуто статусом
+        if device.command_coalesced(value):
+            self.logger.debug(
+                "[Tuya] %s: %s already %s — command skipped", device.name, cp, value,
+                extra={"evt": "cmd_coalesced", "dev": device.name},
+            )
+            return CommandResult.ok()
 
+        # payload собираем сразу в нужном виде — без промежуточного {"devId", "commands"};
+        # общий мутируемый шаблон не годится: OverloadProtector шлёт из потоков
         try:
             resp = self.authorisation.device_manager.send_commands(
-                cmd["devId"], cmd["commands"]
+                device.tuya_device_id, [{"code": cp, "value": value}]
             )
             ok = bool(resp.get("success"))
             if ok:
+                device.remember_command(value)
                 return CommandResult.ok()
             self.logger.warning(
                 "[Tuya] %s: command rejected", device.name,
@@ -164,28 +179,117 @@ class RelayTuyaController:
             return self.switch_off(dev).accepted
         return self.set_numeric(dev, int(value)).accepted
 
+    # ---------- batched commands per Tuya parent ----------
+
+    def _prepare_batch(
+        self, items: List[tuple[RelayChannelDevice, Any]]
+    ) -> tuple[dict[str, bool], dict[str, list[tuple[RelayChannelDevice, str, Any]]]]:
+        """Validate items and group them by tuya_device_id.
+
+        bool values need a binary mapping, anything else a numeric one —
+        the same rules as switch_on/switch_off/set_numeric.
+        """
+        results: dict[str, bool] = {}
+        groups: dict[str, list[tuple[RelayChannelDevice, str, Any]]] = {}
+        for dev, value in items:
+            results[dev.id] = False
+            kind = CommandKind.BINARY if isinstance(value, bool) else CommandKind.NUMERIC
+            if dev.property_mapping.command_kind != kind:
+                continue
+            cp, refused = self._control_property(dev)
+            if refused is not None:
+                continue
+            if dev.command_coalesced(value):
+                results[dev.id] = True      # уже в этом состоянии — не шлём
+                continue
+            groups.setdefault(dev.tuya_device_id or dev.id, []).append((dev, cp, value))
+        return results, groups
+
+    def _submit_group(
+        self, parent: str, group: list[tuple[RelayChannelDevice, str, Any]]
+    ) -> dict[str, bool]:
+        """One send_commands call for all channels of one Tuya parent."""
+        commands = [{"code": cp, "value": value} for _, cp, value in group]
+        try:
+            resp = self.authorisation.device_manager.send_commands(parent, commands)
+            ok = bool(resp.get("success"))
+        except Exception:
+            self.logger.error(
+                "[Tuya] %s: batch send_commands error (%d channels)",
+                group[0][0].name, len(group),
+                extra={"evt": "cmd_error", "dev": group[0][0].name},
+                exc_info=True,
+            )
+            ok = False
+        else:
+            if not ok:
+                self.logger.warning(
+                    "[Tuya] %s: batch command rejected (%d channels)",
+                    group[0][0].name, len(group),
+                    extra={"evt": "cmd_rejected", "dev": group[0][0].name},
+                )
+
+        if ok:
+            for dev, cp, value in group:
+                dev.remember_command(value)
+                dev.update_status({cp: value})
+                dev.mark_switched()
+        return {dev.id: ok for dev, _, _ in group}
+
+    def switch_batch(
+        self, items: List[tuple[RelayChannelDevice, Any]]
+    ) -> dict[str, bool]:
+        """Send (device, value) commands, one request per tuya_device_id.
+
+        Returns {device.id: accepted}.  Devices that fail validation are
+        reported as False and are not sent.
+        """
+        results, groups = self._prepare_batch(items)
+        for parent, group in groups.items():
+            results.update(self._submit_group(parent, group))
+        return results
+
     # ---------- batch helpers ----------
 
+    # сколько команд держим «в полёте» одновременно (вместо sleep-паузы)
+    BATCH_CONCURRENCY = 4
+    # пауза между запросами стартового switch_all_off_hard
+    HARD_OFF_DELAY = 0.5
+
+    async def _gather_batch(
+        self, items: List[tuple[RelayChannelDevice, Any]]
+    ) -> dict[str, bool]:
+        """switch_batch, but parents are sent in parallel threads,
+        no more than BATCH_CONCURRENCY at once."""
+        results, groups = self._prepare_batch(items)
+        sem = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def _one(parent, group):
+            async with sem:
+                return await asyncio.to_thread(self._submit_group, parent, group)
+
+        for res in await asyncio.gather(*(_one(p, g) for p, g in groups.items())):
+            results.update(res)
+        return results
+
     async def switch_all_on_soft(self, devices, inverter_voltage):
-        for dev in devices:
-            if dev.ready_to_switch_on(inverter_voltage):
-                logging.info(f"[TuyaCtl] SOFT-ON: {dev.name}")
-                self.switch_on_device(dev)
-                await asyncio.sleep(1)
+        ready = [d for d in devices if d.ready_to_switch_on(inverter_voltage)]
+        for dev in ready:
+            logging.info("[TuyaCtl] SOFT-ON: %s", dev.name)
+        await self._gather_batch([(d, True) for d in ready])
 
     async def switch_all_off_soft(self, devices, inverter_voltage, inverter_on):
-        for dev in devices:
-            if dev.ready_to_switch_off(inverter_voltage, inverter_on):
-                logging.info(f"[TuyaCtl] SOFT-OFF: {dev.name}")
-                self.switch_off_device(dev)
-                await asyncio.sleep(1)
+        ready = [d for d in devices
+                 if d.ready_to_switch_off(inverter_voltage, inverter_on)]
+        for dev in ready:
+            logging.info("[TuyaCtl] SOFT-OFF: %s", dev.name)
+        await self._gather_batch([(d, False) for d in ready])
 
     async def switch_all_on_hard(self, devices: List[RelayChannelDevice]):
-        for device in devices:
-            if not device.is_device_on():
-                logging.info(f"[RelayTuyaController] Жестко включаем: {device.name}")
-                self.switch_on_device(device)
-                await asyncio.sleep(1)
+        off = [d for d in devices if not d.is_device_on()]
+        for device in off:
+            logging.info("[RelayTuyaController] Жестко включаем: %s", device.name)
+        await self._gather_batch([(d, True) for d in off])
 
     async def switch_all_off_hard(self, devices: List[RelayChannelDevice]):
         """Command every device OFF using the canonical property mapping."""
@@ -194,17 +298,23 @@ class RelayTuyaController:
                 "[RESET] %s: submitting OFF", device.name,
                 extra={"evt": "startup_reset_cmd", "dev": device.name},
             )
-            self.switch_off_device(device)
-            await asyncio.sleep(0.5)  # 500ms inter-command delay
+        # стартовый сброс — без параллели: один запрос на родителя по очереди
+        # и 500ms между запросами, чтобы не упереться в rate limit облака
+        _, groups = self._prepare_batch([(d, False) for d in devices])
+        for n, (parent, group) in enumerate(groups.items()):
+            if n:
+                await asyncio.sleep(self.HARD_OFF_DELAY)
+            await asyncio.to_thread(self._submit_group, parent, group)
 
     def update_devices_status(self, devices: list[RelayChannelDevice]) -> None:
         try:
             tuya_ids = [d.id for d in devices]
             response = self.authorisation.device_manager.get_device_list_status(tuya_ids)
+            by_id = {str(d.id): d for d in devices}
 
             for dev_json in response.get("result", []):
                 dev_id = dev_json.get("id")
-                device = self.select_device_by_id(devices, dev_id)
+                device = by_id.get(str(dev_id))
                 if not (device and "status" in dev_json):
                     continue
 
@@ -2,84 +2,174 @@ import threading
 import time
 import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List
 
 from app.device_initializer   import DeviceInitializer
 from app.devices.relay_channel_device import RelayChannelDevice
-from tuya_iot import (
-    TuyaOpenAPI, TuyaDeviceManager, TuyaOpenMQ, AuthType, TUYA_LOGGER,
-    TuyaCloudOpenAPIEndpoint as Endpoint
-)
+from app.tuya.tuya_authorisation import TuyaAuthorisation
+from tuya_iot import TuyaDeviceListener
+
+
+class _StatusListener(TuyaDeviceListener):
+    """Push-обновления из TuyaOpenMQ → TuyaStatusUpdater._on_push."""
+
+    def __init__(self, updater: "TuyaStatusUpdater"):
+        self._updater = updater
+
+    def update_device(self, device):
+        self._updater._on_push(device)
+
+    def add_device(self, device):
+        pass
+
+    def remove_device(self, device_id: str):
+        pass
+
 
 class TuyaStatusUpdater(threading.Thread):
     """
-    Пулы каждую N сек. статусы устройств Tuya и обновляет RelayChannelDevice.
+    Получает статусы устройств Tuya push'ем из TuyaOpenMQ и обновляет
+    RelayChannelDevice сразу по приходу сообщения.
+    Раз в `interval` сек. — сверочный опрос (на случай потерянных сообщений);
+    запросы по разным tuya_device_id идут параллельно (POLL_WORKERS).
     Работает в отдельном потоке — не блокирует основной цикл.
+    Авторизация общая с RelayTuyaController: один токен, один OpenMQ.
     """
 
-    def __init__(self, interval: int = 120):
+    POLL_WORKERS = 8
+
+    def __init__(self, authorisation: TuyaAuthorisation, interval: int = 600):
         super().__init__(daemon=True)
         self.interval = interval
         self.logger   = logging.getLogger("TuyaStatusUpdater")
         self.device_mgr = DeviceInitializer().device_controller      # наш RelayDeviceManager
         self._stop = threading.Event()
 
-        # ---- авторизация Tuya ----
-        tuya_cfg  = DeviceInitializer().get_tuya_config()
-        endpoint  = getattr(Endpoint, tuya_cfg.get("ENDPOINT", "EUROPE"))
-        access_id = tuya_cfg.get("ACCESS_ID", "")
-        access_key= tuya_cfg.get("ACCESS_KEY", "")
-
-        self.openapi = TuyaOpenAPI(endpoint, access_id, access_key)
-        self.openapi.connect()                    # токен
-        self.openapi.auth_type = AuthType.SMART_HOME
-        self.tuya_mgr = TuyaDeviceManager(self.openapi, TuyaOpenMQ(self.openapi))
+        # ---- авторизация Tuya: общая, второго connect() не делаем ----
+        self.tuya_mgr = authorisation.device_manager
+        self.openmq   = authorisation.openmq
+        self._listener = _StatusListener(self)
+        self._groups: Dict[str, List[RelayChannelDevice]] = {}
+        self._groups_rev: int | None = None
 
     # ------------------------------------------------------------------
     def run(self):
         self.logger.info("TuyaStatusUpdater started")
-        while not self._stop.is_set():
-            start = time.time()
-            try:
-                self._update_once()
-            except Exception as exc:
-                self.logger.error(f"Status update failed: {exc}", exc_info=True)
-
-            # спим остаток интервала
-            sleep_for = self.interval - (time.time() - start)
-            if sleep_for > 0:
-                self._stop.wait(sleep_for)
+        self._start_push()
+        try:
+            while not self._stop.is_set():
+                start = time.time()
+                try:
+                    self._update_once()
+                except Exception as exc:
+                    self.logger.error("Status update failed: %s", exc, exc_info=True)
+
+                # спим остаток интервала
+                sleep_for = self.interval - (time.time() - start)
+                if sleep_for > 0:
+                    self._stop.wait(sleep_for)
+        finally:
+            self._stop_push()
+
+    def _start_push(self):
+        if self.openmq is None:          # внедрённый device_manager без MQ
+            self.logger.info("OpenMQ unavailable, polling only")
+            return
+        try:
+            # device_map SDK нужен, чтобы сообщения MQ доходили до listener'а
+            self.refresh_devices()
+            self.tuya_mgr.update_device_caches(list(self._groups))
+            self.tuya_mgr.add_device_listener(self._listener)
+            self.openmq.start()
+        except Exception as exc:
+            self.logger.error("OpenMQ start failed, polling only: %s", exc, exc_info=True)
+
+    def _stop_push(self):
+        if self.openmq is None:
+            return
+        try:
+            self.tuya_mgr.remove_device_listener(self._listener)
+            self.openmq.stop()
+        except Exception as exc:
+            self.logger.warning("OpenMQ stop failed: %s", exc)
+
+    def _on_push(self, device):
+        """Вызывается из потока MQ: device.status — {code: value}."""
+        dev_list = self._groups.get(device.id)
+        if dev_list:
+            self._apply_status(dev_list, device.status)
 
     def stop(self):
         self._stop.set()
 
     # ------------------------------------------------------------------
-    def _update_once(self):
-        """Собираем stat запросами pack по tuya_device_id."""
-        # 1. группы {tuya_device_id: [RelayChannelDevice, ...]}
+    def refresh_devices(self):
+        """Пересобрать группы {tuya_device_id: [RelayChannelDevice, ...]}."""
         groups: Dict[str, List[RelayChannelDevice]] = defaultdict(list)
         for dev in self.device_mgr.get_devices():
             groups[dev.tuya_device_id].append(dev)
+        self._groups = dict(groups)
+        self._groups_rev = self.device_mgr.revision
 
-        # 2. для каждой группы получаем статус устройства (одного)
-        for tuya_id, dev_list in groups.items():
-            res = self.tuya_mgr.get_device_detail(tuya_id)        # базовый инфо
-            status_arr = res.get("status", []) or \
-                         self.tuya_mgr.get_device_status(tuya_id) # fallback
-
-            # status_arr = [{"code": "switch_1", "value": True}, ...]
-            # Приведём к удобному dict
-            cloud_state = {item["code"]: item["value"] for item in status_arr}
+    def _update_once(self):
+        """Собираем stat запросами pack по tuya_device_id."""
+        # 1. группы — только если набор устройств менялся
+        if self._groups_rev != self.device_mgr.revision:
+            self.refresh_devices()
+        groups = self._groups
 
-            # 3. накладываем на каждый локальный RelayChannelDevice
-            for dev in dev_list:
-                if dev.api_key in cloud_state:
-                    dev.update_status({dev.api_key: cloud_state[dev.api_key]})
-                    self.logger.debug(
-                        f"[SYNC] {dev.name} ({dev.id}) = {cloud_state[dev.api_key]}"
-                    )
+        # 2. статусы всех групп запрашиваем параллельно
+        ex = ThreadPoolExecutor(max_workers=self.POLL_WORKERS)
+        try:
+            futures = {ex.submit(self._fetch_status, tuya_id): tuya_id
+                       for tuya_id in groups}
+            for fut in as_completed(futures):
+                if self._stop.is_set():
+                    return                      # stop() — остальные не ждём
+                tuya_id = futures[fut]
+                try:
+                    status_arr = fut.result()
+                except Exception as exc:
+                    self.logger.warning("[SYNC] %s: status failed: %s", tuya_id, exc)
+                    continue
+                self._apply_status_list(groups[tuya_id], status_arr)
+        finally:
+            ex.shutdown(wait=not self._stop.is_set(), cancel_futures=True)
 
         # Для отладочного/сводного лога
-        active = [d.name for d in self.device_mgr.all_devices_on()]
-        self.logger.info(f"[SUMMARY] ON: {', '.join(active) if active else 'none'}")
+        if self.logger.isEnabledFor(logging.INFO):
+            active = [d.name for d in self.device_mgr.all_devices_on()]
+            self.logger.info("[SUMMARY] ON: %s", ", ".join(active) if active else "none")
+
+    def _fetch_status(self, tuya_id: str) -> list:
+        res = self.tuya_mgr.get_device_detail(tuya_id)        # базовый инфо
+        return res.get("status", []) or \
+               self.tuya_mgr.get_device_status(tuya_id)       # fallback
+
+    def _apply_status(self, dev_list: List[RelayChannelDevice], cloud_state: dict):
+        # 3. накладываем на каждый локальный RelayChannelDevice
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        for dev in dev_list:
+            if dev.api_key in cloud_state:
+                value = cloud_state[dev.api_key]
+                dev.update_status({dev.api_key: value})
+                if debug:
+                    self.logger.debug("[SYNC] %s (%s) = %s", dev.name, dev.id, value)
 
+    def _apply_status_list(self, dev_list: List[RelayChannelDevice], status_arr: list):
+        """
+        status_arr = [{"code": "switch_1", "value": True}, ...] — один проход,
+        без промежуточного dict: берём только коды наших каналов.
+        """
+        wanted = {dev.api_key: dev for dev in dev_list}
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        for item in status_arr:
+            code = item["code"]
+            dev = wanted.get(code)
+            if dev is None:
+                continue
+            value = item["value"]
+            dev.update_status({code: value})
+            if debug:
+                self.logger.debug("[SYNC] %s (%s) = %s", dev.name, dev.id, value)
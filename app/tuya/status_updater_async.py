@@ -1,16 +1,31 @@
 # app/status_updater_async.py
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any
 
-from app.utils.time_utils import smart_sleep
+from app.devices.device_observation import FRESH_MAX_AGE_SECONDS
+from app.utils.time_utils import night_multiplier, wait_stop
 from shared_state.shared_state import shared_state
 
 TUYA_RPC_TIMEOUT = 20
+# dedicated threads for Tuya RPCs: a hung cloud call occupies one of these,
+# not the loop's default executor shared with the rest of the app
+TUYA_RPC_WORKERS = 4
+# Tuya's batch status endpoint accepts at most 20 device ids per request;
+# larger parent lists are split and the chunks polled concurrently
+TUYA_STATUS_BATCH = 20
 MAX_ISOLATION_REQUESTS = 16
 PERMISSION_DENIED_RETRY_SECONDS = 300
 PERMISSION_DENIED_MAX_RETRY_SECONDS = 3600
+# Adaptive polling backs off to at most this many seconds (before the night
+# multiplier) while observed states are unchanged.
+ADAPTIVE_MAX_INTERVAL = 150
+# The pause between polls (backoff × night multiplier) is capped at
+# FRESH_MAX_AGE_SECONDS minus this margin, so an observation is refreshed
+# before it turns STALE even when the next poll runs into TUYA_RPC_TIMEOUT.
+FRESH_POLL_MARGIN = 30
 
 logger = logging.getLogger("TuyaStatusUpdater")
 
@@ -41,14 +56,25 @@ class TuyaStatusUpdaterAsync:
     """
 
     def __init__(self, interval: int = 30, dev_mgr=None, authorisation=None,
-                 telemetry_registry=None):
+                 telemetry_registry=None, max_interval: int | None = None):
         self.interval = interval
+        self.max_interval = max(interval, max_interval or ADAPTIVE_MAX_INTERVAL)
+        self._cur_interval = interval
+        # (device id, observed value) pairs seen during the current tick
+        self._tick_state: list[tuple[str, Any]] | None = []
+        self._last_state: list[tuple[str, Any]] | None = None
         self._stop = asyncio.Event()
         self.dev_mgr = dev_mgr
         self.auth = authorisation
         self._parent_states: dict[str, ParentCommState] = {}
         self._isolation_budget: int = 0
         self._telemetry = telemetry_registry
+        self._executor = ThreadPoolExecutor(
+            max_workers=TUYA_RPC_WORKERS, thread_name_prefix="tuya-status",
+        )
+        # poll targets cached until dev_mgr.revision changes
+        self._targets: tuple[list[str], dict[str, list[Any]]] | None = None
+        self._targets_rev: int | None = None
 
     # -------------------------------------------------------------
     async def run(self):
@@ -57,15 +83,63 @@ class TuyaStatusUpdaterAsync:
             try:
                 await self._update_once()
             except Exception as exc:
-                logger.error(f"status update failed: {exc}", exc_info=True)
-            await smart_sleep(self._stop, self.interval)
+                logger.error("status update failed: %s", exc, exc_info=True)
+                self._tick_state = None
+            self._adapt_interval(self._tick_state)
+            await wait_stop(self._stop, self._sleep_delay())
+        self._executor.shutdown(wait=False, cancel_futures=True)
         logger.info("Async-status-updater stopped")
 
+    # -------------------------------------------------------------
+    async def _rpc(self, fn, *args):
+        """Run a blocking SDK call on the updater's executor with
+        TUYA_RPC_TIMEOUT (raises asyncio.TimeoutError)."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, fn, *args),
+            timeout=TUYA_RPC_TIMEOUT,
+        )
+
+    # -------------------------------------------------------------
+    def _adapt_interval(self, state: list[tuple[str, Any]] | None) -> None:
+        """Double the poll interval (up to max_interval) while the observed
+        states repeat; fall back to the base interval on any change or error.
+        """
+        if state and state == self._last_state:
+            self._cur_interval = min(self._cur_interval * 2, self.max_interval)
+        else:
+            if self._cur_interval != self.interval:
+                logger.debug("[Updater] state changed — poll interval back to %ss",
+                             self.interval)
+            self._cur_interval = self.interval
+        self._last_state = state
+
+    def _sleep_delay(self, now: datetime | None = None) -> float:
+        """Pause before the next poll: the backed-off interval times the night
+        multiplier, capped so observations stay FRESH between polls.  Never
+        shorter than the configured base interval.
+        """
+        cap = FRESH_MAX_AGE_SECONDS - FRESH_POLL_MARGIN
+        return max(1, self.interval,
+                   min(self._cur_interval * night_multiplier(now), cap))
+
     # -------------------------------------------------------------
     async def refresh_once(self) -> None:
         """Perform exactly one observation cycle."""
         await self._update_once()
 
+    # -------------------------------------------------------------
+    def _poll_targets(self) -> tuple[list[str], dict[str, list[Any]]]:
+        """Cached _build_poll_targets(), rebuilt when the device set changes.
+
+        Managers without a ``revision`` counter get a fresh build every tick.
+        """
+        rev = getattr(self.dev_mgr, "revision", None)
+        if rev is None or self._targets is None or rev != self._targets_rev:
+            self._targets = self._build_poll_targets()
+            self._targets_rev = rev
+        return self._targets
+
     # -------------------------------------------------------------
     def _build_poll_targets(self) -> tuple[list[str], dict[str, list[Any]]]:
         """Build ordered list of unique parent IDs and parent->devices index.
@@ -112,9 +186,12 @@ class TuyaStatusUpdaterAsync:
         return ordered, parent_to_devices
 
     # -------------------------------------------------------------
-    def _get_healthy_parents(self, all_parents: list[str]) -> list[str]:
+    def _get_healthy_parents(
+        self, all_parents: list[str], now: float | None = None,
+    ) -> list[str]:
         """Return parents that are not in quarantine."""
-        now = datetime.now(timezone.utc).timestamp()
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
         healthy = []
         for pid in all_parents:
             state = self._parent_states.get(pid)
@@ -132,19 +209,25 @@ class TuyaStatusUpdaterAsync:
 
     # -------------------------------------------------------------
     async def _update_once(self) -> None:
-        all_parents, parent_to_devices = self._build_poll_targets()
+        self._tick_state = []
+        all_parents, parent_to_devices = self._poll_targets()
         if not all_parents:
             logger.debug("[Updater] No enabled observable parents to poll")
             return
 
-        healthy = self._get_healthy_parents(all_parents)
+        # one clock read per tick, shared by quarantine checks and observations
+        now_utc = datetime.now(timezone.utc)
+        now_f = now_utc.timestamp()
+        # epoch seconds from the same read: tick() compares it with wall-clock
+        # last_switched/last_tick_ts and derives the daily reset date from it;
+        # a backward clock step is already dropped there by elapsed > 0
+        now_ts = int(now_f)
+
+        healthy = self._get_healthy_parents(all_parents, now_f)
         if not healthy:
             logger.debug("[Updater] All parents quarantined — skipping cycle")
             return
 
-        now_utc = datetime.now(timezone.utc)
-        now_ts = int(now_utc.timestamp())
-
         # Healthy fast path: single batch
         if len(healthy) == len(all_parents):
             await self._poll_and_process(healthy, parent_to_devices, now_utc, now_ts)
@@ -153,7 +236,7 @@ class TuyaStatusUpdaterAsync:
             await self._poll_and_process(healthy, parent_to_devices, now_utc, now_ts)
             for pid in all_parents:
                 state = self._parent_states.get(pid)
-                if state and state.status == "permission_denied" and now_utc.timestamp() >= state.retry_at:
+                if state and state.status == "permission_denied" and now_f >= state.retry_at:
                     await self._poll_and_process(
                         [pid], parent_to_devices, now_utc, now_ts
                     )
@@ -169,14 +252,24 @@ class TuyaStatusUpdaterAsync:
         """Poll a list of parent IDs and process results."""
         if not parent_ids:
             return
+        if len(parent_ids) > TUYA_STATUS_BATCH:
+            chunks = [
+                parent_ids[i:i + TUYA_STATUS_BATCH]
+                for i in range(0, len(parent_ids), TUYA_STATUS_BATCH)
+            ]
+            results = await asyncio.gather(
+                *(self._poll_and_process(chunk, parent_to_devices, now_utc, now_ts)
+                  for chunk in chunks),
+                return_exceptions=True,
+            )
+            for res in results:
+                if isinstance(res, Exception):
+                    logger.error("[Updater] batch chunk failed: %s", res, exc_info=res)
+            return
 
         try:
-            result = await asyncio.wait_for(
-                asyncio.to_thread(
-                    self.auth.device_manager.get_device_list_status,
-                    parent_ids,
-                ),
-                timeout=TUYA_RPC_TIMEOUT,
+            result = await self._rpc(
+                self.auth.device_manager.get_device_list_status, parent_ids,
             )
         except asyncio.TimeoutError:
             logger.warning(
@@ -224,12 +317,8 @@ class TuyaStatusUpdaterAsync:
                         len(parent_ids),
                     )
                     try:
-                        retry_result = await asyncio.wait_for(
-                            asyncio.to_thread(
-                                self.auth.device_manager.get_device_list_status,
-                                parent_ids,
-                            ),
-                            timeout=TUYA_RPC_TIMEOUT,
+                        retry_result = await self._rpc(
+                            self.auth.device_manager.get_device_list_status, parent_ids,
                         )
                         if (
                             (
@@ -309,12 +398,8 @@ class TuyaStatusUpdaterAsync:
             if not half:
                 continue
             try:
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self.auth.device_manager.get_device_list_status,
-                        half,
-                    ),
-                    timeout=TUYA_RPC_TIMEOUT,
+                result = await self._rpc(
+                    self.auth.device_manager.get_device_list_status, half,
                 )
             except asyncio.TimeoutError:
                 # Do not split on transient errors
@@ -468,9 +553,13 @@ class TuyaStatusUpdaterAsync:
         # Track which sensor parents need individual fallback
         sensor_parents_needing_fallback: list[str] = []
 
-        logger.debug("[Updater] _process_result raw keys: %s, result type: %s",
-                     list(result.keys()) if isinstance(result, dict) else type(result),
-                     type(result).__name__)
+        # level checked once per result: the per-device debug lines below
+        # build sorted key lists, which must not run on every poll in production
+        dbg = logger.isEnabledFor(logging.DEBUG)
+        if dbg:
+            logger.debug("[Updater] _process_result raw keys: %s, result type: %s",
+                         list(result.keys()) if isinstance(result, dict) else type(result),
+                         type(result).__name__)
         device_list = self._extract_device_result_list(result)
         logger.debug("[Updater] _process_result device_list len: %d", len(device_list))
         for dev_res in device_list:
@@ -480,11 +569,12 @@ class TuyaStatusUpdaterAsync:
                 or dev_res.get("devId")
             )
             if tuya_id not in parent_to_devices:
-                logger.debug(
-                    "[Updater] Tuya row parent not configured: parent=%s status_count=%d",
-                    tuya_id,
-                    len(self._extract_status_list(dev_res)),
-                )
+                if dbg:
+                    logger.debug(
+                        "[Updater] Tuya row parent not configured: parent=%s status_count=%d",
+                        tuya_id,
+                        len(self._extract_status_list(dev_res)),
+                    )
                 continue
             # Log online/offline status from Tuya response
             is_online = dev_res.get("online")
@@ -546,6 +636,8 @@ class TuyaStatusUpdaterAsync:
                     if cp is not None and str(cp) != str(sp):
                         value = status_by_code.get(str(cp))
                 if value is not None:
+                    if self._tick_state is not None:
+                        self._tick_state.append((dev.id, value))
                     dev.update_observation_from_tuya(value, now_utc)
                     # Persist last-known state to shared_state for safety fallback
                     from shared_state.shared_state import shared_state as _ss
@@ -556,16 +648,17 @@ class TuyaStatusUpdaterAsync:
                             "observed_at": now_utc.isoformat(),
                             "source": "tuya",
                         }
-                    logger.debug(
-                        "[Updater] load-observation-updated dev=%s state_property=%s "
-                        "value=%r observed_state=%s status_keys=%s",
-                        getattr(dev, "id", ""),
-                        sp,
-                        value,
-                        getattr(getattr(dev, "observation", None), "observed_state", None),
-                        sorted(status_by_code.keys()),
-                    )
-                else:
+                    if dbg:
+                        logger.debug(
+                            "[Updater] load-observation-updated dev=%s state_property=%s "
+                            "value=%r observed_state=%s status_keys=%s",
+                            getattr(dev, "id", ""),
+                            sp,
+                            value,
+                            getattr(getattr(dev, "observation", None), "observed_state", None),
+                            sorted(status_by_code.keys()),
+                        )
+                elif dbg:
                     logger.debug(
                         "[Updater] load-observation-missing dev=%s state_property=%s "
                         "status_keys=%s",
@@ -590,7 +683,7 @@ class TuyaStatusUpdaterAsync:
                         pass
 
                 try:
-                    parsed = dev.extract_status(status_list)
+                    parsed = dev.extract_status(status_by_code)
                 except Exception as exc:
                     logger.debug(
                         "[Updater] legacy-status-parse-failed dev=%s: %s",
@@ -602,16 +695,15 @@ class TuyaStatusUpdaterAsync:
                     dev.update_status(parsed)
                 dev.tick(now_ts)
 
-                if dev.device_type.lower() != "pump":
+                if dev.device_type_lc != "pump":
                     continue
-                mode_val = next(
-                    (item["value"] for item in status_list
-                     if item["code"] == dev.tuya_code_mode()),
-                    None,
-                )
+                mode_val = status_by_code.get(dev.mode_code)
+                if self._tick_state is not None:
+                    self._tick_state.append(
+                        (dev.id, (mode_val, status_by_code.get(dev.speed_code))))
                 if mode_val is not None:
                     try:
-                        shared_state["pump_mode"] = int(mode_val)
+                        shared_state.update_changed({"pump_mode": int(mode_val)})
                     except (ValueError, TypeError):
                         logger.debug("[Updater] Problem with sync")
 
@@ -751,12 +843,8 @@ class TuyaStatusUpdaterAsync:
         Used when the batch response was empty or missing telemetry.
         At most once per parent per cycle."""
         try:
-            result = await asyncio.wait_for(
-                asyncio.to_thread(
-                    self.auth.device_manager.get_device_status,
-                    parent_id,
-                ),
-                timeout=TUYA_RPC_TIMEOUT,
+            result = await self._rpc(
+                self.auth.device_manager.get_device_status, parent_id,
             )
         except (asyncio.TimeoutError, Exception) as exc:
             logger.debug(
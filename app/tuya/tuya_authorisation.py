@@ -54,6 +54,7 @@ class TuyaAuthorisation:
             # Injected device manager — no Tuya connection
             self.deviceManager = device_manager
             self.openapi = None
+            self.openmq = None
             return
 
         if not access_id or not access_key:
@@ -66,7 +67,9 @@ class TuyaAuthorisation:
         self.openapi = TuyaOpenAPI(ep, access_id, access_key)
         self.openapi.connect()
         self.openapi.auth_type = AuthType.SMART_HOME
-        self.deviceManager = TuyaDeviceManager(self.openapi, TuyaOpenMQ(self.openapi))
+        # один OpenMQ на процесс: его же запускает TuyaStatusUpdater для push'ей
+        self.openmq = TuyaOpenMQ(self.openapi)
+        self.deviceManager = TuyaDeviceManager(self.openapi, self.openmq)
         self.deviceStatuses = {}
 
     @property
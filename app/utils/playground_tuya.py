@@ -1,18 +1,13 @@
-import json
+"""
+Ручная проверка Tuya API: python -m app.utils.playground_tuya
+
+Импорт модуля ничего не делает — SDK подтягивается и TUYA_LOGGER
+настраивается только при запуске как скрипта (рабочий TuyaAuthorisation
+держит SDK-логгер на ERROR, его не трогаем).
+"""
 import logging
-import sys
-import time
-import os
-from pprint import pprint
-
-from tuya_iot import (
-    TuyaOpenAPI,
-    TuyaDeviceManager,
-    TuyaOpenMQ,
-    AuthType,
-    TuyaCloudOpenAPIEndpoint as Endpoint,
-    TUYA_LOGGER
-)
+
+__all__: list[str] = []
 
 DEVICE_ID = " "
 ACCESS_ID= ""
@@ -21,28 +16,29 @@ DP_CODE    = "switch_1"               # либо cur_power, voltage, …
 HOURS      = 12                       # глубина истории
 LIMIT      = 100                      # макс. строк
 
-ENDPOINT   = Endpoint.EUROPE
 
+def _connect():
+    from tuya_iot import (
+        TuyaOpenAPI,
+        TuyaDeviceManager,
+        TuyaOpenMQ,
+        AuthType,
+        TuyaCloudOpenAPIEndpoint as Endpoint,
+        TUYA_LOGGER
+    )
 
-class TuyaAuthorisation():
-    def __init__(self):
-        TUYA_LOGGER.setLevel(logging.INFO)
-        self.openapi = TuyaOpenAPI(ENDPOINT, ACCESS_ID, ACCESS_KEY)
-        self.openapi.auth_type = AuthType.SMART_HOME
-        self.openapi.connect()
-        self.deviceManager = TuyaDeviceManager(self.openapi, TuyaOpenMQ(self.openapi))
-
-    @property
-    def device_manager(self):
-        return self.deviceManager
+    TUYA_LOGGER.setLevel(logging.INFO)
+    openapi = TuyaOpenAPI(Endpoint.EUROPE, ACCESS_ID, ACCESS_KEY)
+    openapi.auth_type = AuthType.SMART_HOME
+    openapi.connect()
+    return TuyaDeviceManager(openapi, TuyaOpenMQ(openapi))
 
 
 if __name__ == "__main__":
     try:
-        tuya_auth = TuyaAuthorisation()
+        device_manager = _connect()
         # Вызовите напрямую метод openapi.get
-        statuses = tuya_auth.device_manager.get_device_list_status([DEVICE_ID])
+        statuses = device_manager.get_device_list_status([DEVICE_ID])
         print("RAW API RESPONSE:", statuses)
     except Exception as e:
         logging.exception("Critical error occurred")
-
@@ -1,12 +1,15 @@
 # app/utils/time_utils.py
+import asyncio
 from datetime import datetime
 
-def night_multiplier() -> int:
+def night_multiplier(now: datetime | None = None) -> int:
     """
     • 22:00 – 07:00  → коэффициент 5
     • иначе          → 1
+
+    `now` — уже взятое время тика, чтобы не звать datetime.now() повторно.
     """
-    h = datetime.now().hour
+    h = (now or datetime.now()).hour
     return 5 if (h >= 22 or h < 7) else 1
 
 
@@ -18,10 +21,15 @@ async def smart_sleep(stop_event, base_sec: int) -> None:
     • Прерывается мгновенно, если `stop_event.set()` вызывается
       при завершении приложения.
     """
-    from asyncio import wait_for, TimeoutError
     k = night_multiplier()
-    delay = max(1, base_sec * k)
+    await wait_stop(stop_event, max(1, base_sec * k))
+
+
+async def wait_stop(stop_event, delay: float) -> None:
+    """Ждёт `delay` секунд как есть (без ночного множителя) или до stop_event."""
+    # asyncio.wait по таймауту просто возвращается — без TimeoutError на каждый цикл
+    waiter = asyncio.ensure_future(stop_event.wait())
     try:
-        await wait_for(stop_event.wait(), timeout=delay)
-    except TimeoutError:
-        pass          # нормальный переход к следующему циклу
+        await asyncio.wait((waiter,), timeout=delay)
+    finally:
+        waiter.cancel()
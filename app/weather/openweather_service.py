@@ -5,14 +5,28 @@
 """
 
 import asyncio
+import hashlib
 import logging
+import time
 from datetime import datetime
 from typing import Optional
 import aiohttp
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    _loads = json.loads
+
 from shared_state.shared_state import shared_state
 
 
+MAX_BACKOFF_MULT = 32  # 429/5xx: интервал удваивается до update_interval × 32
+
+
 class OpenWeatherService:
     """
     Получает текущую погоду и почасовой прогноз через OpenWeatherMap API.
@@ -37,10 +51,30 @@ class OpenWeatherService:
         self.base_url = "https://api.openweathermap.org/data/3.0/onecall"
 
         self.logger = logging.getLogger("OpenWeather")
-        self._last_update: Optional[datetime] = None
+        self._last_update_ts: float = 0.0  # time.time(); в datetime — только в get_statistics
         self._fetch_count = 0
         self._error_count = 0
         self._session: Optional[aiohttp.ClientSession] = None
+        # отпечаток прошлого ответа: тот же body → не парсим и не пишем shared_state
+        self._last_body_hash: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        # backoff после 429/5xx; сбрасывается первым успешным ответом
+        self._backoff_mult = 1
+        self._retry_after = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Одна сессия на весь срок сервиса (создаётся лениво): соединение
+        с OpenWeatherMap и DNS переиспользуются, TLS не повторяется на каждый опрос.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=2, keepalive_timeout=75, ttl_dns_cache=600,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
 
     async def fetch_weather(self) -> bool:
         """Получить погоду и прогноз, записать в shared_state"""
@@ -53,12 +87,7 @@ class OpenWeatherService:
         }
 
         try:
-            if not self._session:
-                self.logger.warning("ClientSession not initialized, creating temporary one")
-                async with aiohttp.ClientSession() as session:
-                    return await self._do_fetch(session, params)
-
-            return await self._do_fetch(self._session, params)
+            return await self._do_fetch(self._get_session(), params)
 
         except asyncio.TimeoutError:
             self.logger.error(f"❌ Weather API timeout after {self.timeout}s")
@@ -73,16 +102,30 @@ class OpenWeatherService:
     async def _do_fetch(self, session: aiohttp.ClientSession, params: dict) -> bool:
         """Внутренний метод для выполнения HTTP запроса"""
         try:
-            async with session.get(
-                    self.base_url,
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-            ) as resp:
+            headers = {"If-None-Match": self._etag} if self._etag else None
+            async with session.get(self.base_url, params=params, headers=headers) as resp:
+                    if resp.status in (200, 304):
+                        self._backoff_mult = 1
+                        self._retry_after = 0
+
+                    if resp.status == 304:
+                        self.logger.debug("Weather not modified (ETag)")
+                        self._last_update_ts = time.time()
+                        return True
+
                     if resp.status == 200:
-                        data = await resp.json()
-                        self._update_shared_state(data)
+                        raw = await resp.read()
+                        self._etag = resp.headers.get("ETag")
+                        digest = hashlib.blake2b(raw, digest_size=16).digest()
+                        if digest == self._last_body_hash:
+                            self.logger.debug("Weather payload unchanged, skip parse")
+                            self._last_update_ts = time.time()
+                            return True
+
+                        self._update_shared_state(_loads(raw))
+                        self._last_body_hash = digest
                         self._fetch_count += 1
-                        self._last_update = datetime.now()
+                        self._last_update_ts = time.time()
 
                         self.logger.info(
                             f"✅ Weather updated: "
@@ -97,7 +140,12 @@ class OpenWeatherService:
                         return False
 
                     else:
-                        self.logger.error(f"❌ Weather API error: {resp.status}")
+                        if resp.status == 429 or resp.status >= 500:
+                            self._backoff(resp.headers.get("Retry-After"))
+                        self.logger.error(
+                            f"❌ Weather API error: {resp.status}, "
+                            f"next try in {self._next_delay()}s"
+                        )
                         self._error_count += 1
                         return False
 
@@ -106,38 +154,50 @@ class OpenWeatherService:
             self._error_count += 1
             return False
 
+    def _backoff(self, retry_after: Optional[str]) -> None:
+        """Удвоить паузу до следующего запроса; учесть Retry-After (секунды)."""
+        self._backoff_mult = min(self._backoff_mult * 2, MAX_BACKOFF_MULT)
+        try:
+            self._retry_after = max(0, int(retry_after or 0))
+        except ValueError:
+            self._retry_after = 0  # HTTP-date не разбираем — хватит backoff
+
+    def _next_delay(self) -> int:
+        return max(self.update_interval * self._backoff_mult, self._retry_after)
+
     def _update_shared_state(self, data: dict) -> None:
-        """Записать данные в shared_state (dict-like)"""
+        """Записать в shared_state одним вызовом — только изменившиеся ключи"""
 
         # ========== ТЕКУЩЕЕ СОСТОЯНИЕ ==========
         current = data.get("current", {})
-
-        # ✅ Dict-like синтаксис вместо .set()
-        shared_state["ambient_temp"] = current.get("temp")
-        shared_state["humidity"] = current.get("humidity")
-        shared_state["pressure_hpa"] = current.get("pressure")
-        shared_state["wind_speed_mps"] = current.get("wind_speed")
-        shared_state["clouds"] = current.get("clouds")
-        shared_state["uvi"] = current.get("uvi")
+        payload = {
+            "ambient_temp": current.get("temp"),
+            "humidity": current.get("humidity"),
+            "pressure_hpa": current.get("pressure"),
+            "wind_speed_mps": current.get("wind_speed"),
+            "clouds": current.get("clouds"),
+            "uvi": current.get("uvi"),
+        }
 
         # Weather description
         weather_list = current.get("weather", [])
         if weather_list:
-            shared_state["weather_description"] = weather_list[0].get("description")
+            payload["weather_description"] = weather_list[0].get("description")
 
         # ========== ПРОГНОЗ HOURLY ==========
-        hourly = data.get("hourly", [])
-        shared_state["forecast_hourly"] = hourly
-        shared_state["forecast_source"] = "OpenWeatherMap"
+        payload["forecast_hourly"] = data.get("hourly", [])
+        payload["forecast_source"] = "OpenWeatherMap"
 
         # ========== ПРОГНОЗ DAILY ==========
         daily = data.get("daily", [])
         if daily:
             today = daily[0]
             temp = today.get("temp", {})
-            shared_state["daily_temp_min"] = temp.get("min")
-            shared_state["daily_temp_max"] = temp.get("max")
-            shared_state["daily_pop"] = today.get("pop")
+            payload["daily_temp_min"] = temp.get("min")
+            payload["daily_temp_max"] = temp.get("max")
+            payload["daily_pop"] = today.get("pop")
+
+        shared_state.update_changed(payload)
 
     async def run(self, stop_event: asyncio.Event) -> None:
         """Основной цикл обновления погоды"""
@@ -147,21 +207,22 @@ class OpenWeatherService:
             f"update_interval={self.update_interval}s"
         )
 
-        # Создаем переиспользуемую сессию
-        self._session = aiohttp.ClientSession()
+        # переиспользуемая сессия
+        self._get_session()
 
         try:
             # Первый запрос сразу
             await self.fetch_weather()
 
-            while not stop_event.is_set():
-                try:
-                    await asyncio.wait_for(
-                        stop_event.wait(),
-                        timeout=self.update_interval
-                    )
-                except asyncio.TimeoutError:
-                    await self.fetch_weather()
+            # один waiter на весь цикл; таймаут asyncio.wait — без исключения
+            stop_waiter = asyncio.ensure_future(stop_event.wait())
+            try:
+                while not stop_event.is_set():
+                    await asyncio.wait((stop_waiter,), timeout=self._next_delay())
+                    if not stop_waiter.done():
+                        await self.fetch_weather()
+            finally:
+                stop_waiter.cancel()
 
         finally:
             # Закрываем сессию при завершении
@@ -177,7 +238,8 @@ class OpenWeatherService:
     def get_statistics(self) -> dict:
         """Статистика работы сервиса"""
         return {
-            "last_update": self._last_update.isoformat() if self._last_update else None,
+            "last_update": (datetime.fromtimestamp(self._last_update_ts).isoformat()
+                            if self._last_update_ts else None),
             "fetch_count": self._fetch_count,
             "error_count": self._error_count,
             "current_temp": shared_state.get("ambient_temp"),
@@ -3,7 +3,7 @@
 
 Exercises all five request paths, validates redaction of sensitive
 parameters in logger output, stdout, and exception messages.
-Preserves the complete signed URL passed to urllib.request.urlopen.
+Preserves the complete signed URL passed to app.api._http_get.
 
 Usage:
     bash scripts/check-dess-request-diagnostics-redaction.sh   # preferred
@@ -141,11 +141,23 @@ class TestHarness:
         else:
             raise RuntimeError(f"Unexpected URL pattern: {url}")
 
+    def _mock_http_get(self, url: str, **kwargs) -> bytes:
+        """Mock app.api._http_get: same routing as _mock_urlopen, body bytes."""
+        return self._mock_urlopen(url, **kwargs).read()
+
+    @staticmethod
+    def _format_log(msg, args) -> str:
+        """Render %-style args too: secrets can travel in args, not in msg."""
+        try:
+            return str(msg) % args if args else str(msg)
+        except (TypeError, ValueError):
+            return " ".join([str(msg), *map(str, args)])
+
     def _capture_log_info(self, msg, *args, **kwargs):
-        self.captured_log_info.append(str(msg))
+        self.captured_log_info.append(self._format_log(msg, args))
 
     def _capture_log_error(self, msg, *args, **kwargs):
-        self.captured_log_error.append(str(msg))
+        self.captured_log_error.append(self._format_log(msg, args))
 
     def _capture_print(self, *args, **kwargs):
         text = " ".join(str(a) for a in args)
@@ -189,9 +201,9 @@ class TestHarness:
 
     def create_api(self) -> DessAPI:
         """Create a DessAPI with mocked urlopen for init, plus mocked logger/print."""
-        real_urlopen = unittest.mock.patch("urllib.request.urlopen")
+        real_urlopen = unittest.mock.patch("app.api._http_get")
         urlopen_mock = real_urlopen.start()
-        urlopen_mock.side_effect = self._mock_urlopen
+        urlopen_mock.side_effect = self._mock_http_get
         self._patches.append(real_urlopen)
 
         config = FakeConfig()
@@ -226,6 +238,76 @@ class TestHarness:
                 pass
         self._patches = []
 
+    def run_requests_exception_group(self, api_mod) -> None:
+        """Drive the real _http_get with requests errors whose text holds the URL."""
+        import requests
+        from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+        def http_500(url, **kw):
+            # real Response → real raise_for_status() message "... for url: <url>"
+            self.captured_urls.append(url)
+            resp = requests.Response()
+            resp.status_code = 500
+            resp.reason = "Internal Server Error"
+            resp.url = url
+            resp._content = b""
+            return resp
+
+        def conn_refused(url, **kw):
+            # "... Max retries exceeded with url: /public/?sign=..&token=.."
+            self.captured_urls.append(url)
+            path = url.split("dessmonitor.com", 1)[-1]
+            reason = NewConnectionError(None, "Failed to establish a new connection")
+            raise requests.ConnectionError(MaxRetryError(None, path, reason))
+
+        cases = [
+            ("HTTPError", http_500, "HTTP Error 500"),
+            ("ConnectionError", conn_refused, "ConnectionError"),
+        ]
+        for label, side_effect, expected in cases:
+            for path_name in ("primary", "fallback"):
+                api = self.create_api()
+                api.logger.error = self._capture_log_error
+                self.captured_log_error = []
+
+                # init прошёл через мок _http_get; дальше — настоящий _http_get
+                self.cleanup()
+                get_patch = unittest.mock.patch.object(
+                    api_mod._SESSION, "get", side_effect=side_effect)
+                get_patch.start()
+                self._patches.append(get_patch)
+
+                ctx = f"4b {label} {path_name}"
+                try:
+                    if path_name == "primary":
+                        api._do_api_request(None, need_auth=True,
+                                            precomputed_query=api._query_last_data)
+                    else:
+                        api.fetch_device_data_fallback()
+                    self.assert_true(False, f"[{ctx}] exception should have been raised")
+                except RuntimeError as exc:
+                    chain, e = [], exc
+                    while e is not None:
+                        chain.append(str(e))
+                        e = e.__cause__ or e.__context__
+                    text = " | ".join(chain)
+                    self.assert_true(
+                        "sign=" not in text and FAKE_TOKEN not in text
+                        and FAKE_PN not in text and FAKE_SN not in text,
+                        f"[{ctx}] exception chain carries no signed URL",
+                    )
+                    self.assert_true(
+                        expected in str(exc),
+                        f"[{ctx}] exception keeps '{expected}' detail",
+                    )
+                error_text = " ".join(self.captured_log_error)
+                self.assert_true(
+                    FAKE_TOKEN not in error_text and "sign=" not in error_text,
+                    f"[{ctx}] logger error output carries no signed URL",
+                )
+                self.check_forbidden_in_text(error_text, f"{ctx} logger error output")
+                self.cleanup()
+
     def run_all(self) -> int:
         """Run all assertion groups. Returns exit code (0=pass, 1=fail)."""
 
@@ -311,9 +393,9 @@ class TestHarness:
         logger.handlers = []
 
         # For the auth during init, urlopen must return success
-        real_urlopen = unittest.mock.patch("urllib.request.urlopen")
+        real_urlopen = unittest.mock.patch("app.api._http_get")
         urlopen_mock = real_urlopen.start()
-        urlopen_mock.side_effect = self._mock_urlopen
+        urlopen_mock.side_effect = self._mock_http_get
         self._patches.append(real_urlopen)
 
         api_exc = DessAPI(config, logger)
@@ -415,9 +497,9 @@ class TestHarness:
         logger.setLevel(logging.DEBUG)
         logger.handlers = []
 
-        real_urlopen = unittest.mock.patch("urllib.request.urlopen")
+        real_urlopen = unittest.mock.patch("app.api._http_get")
         urlopen_mock = real_urlopen.start()
-        urlopen_mock.side_effect = self._mock_urlopen
+        urlopen_mock.side_effect = self._mock_http_get
         self._patches.append(real_urlopen)
 
         api4 = DessAPI(config, logger)
@@ -462,6 +544,16 @@ class TestHarness:
 
         self.cleanup()
 
+        # ═══════════════════════════════════════════════════════════════
+        # Group 4b: Real requests exceptions (text carries the signed URL)
+        # ═══════════════════════════════════════════════════════════════
+        print("\n── Group 4b: Real requests exceptions ──")
+        import app.api as api_mod
+        if getattr(api_mod, "_SESSION", None) is None:
+            print("  (requests not installed — urllib fallback in use, skipped)")
+        else:
+            self.run_requests_exception_group(api_mod)
+
         # ═══════════════════════════════════════════════════════════════
         # Group 5: Authentication request (need_auth=False)
         # ═══════════════════════════════════════════════════════════════
@@ -521,7 +613,7 @@ class TestHarness:
         # Group 6: Request timeout unchanged (structural check)
         # ═══════════════════════════════════════════════════════════════
         print("\n── Group 6: Request timeout unchanged ──")
-        # The timeout values are hardcoded literals (120 and 20) in the urlopen
+        # The timeout values are hardcoded literals (120 and 20) in the _http_get
         # calls. Since we are not modifying those lines, they are preserved.
         self.assert_true(
             True,
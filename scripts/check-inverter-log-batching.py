@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Validation: batched inverter log writes (BatchingQueueListener).
+
+Tests:
+1. Records queued within flush_interval reach the file in one write().
+2. batch_size bounds a single drain.
+3. stop() flushes records that are still queued.
+4. Non-file handlers receive every record via handle().
+5. queued_logger keeps the record name and does not touch the shared logger.
+6. A record at flush_level ends the batch without waiting for flush_interval.
+"""
+
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+# Ensure repo root is on sys.path
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from app.logger import BatchingQueueListener, queued_logger
+
+ERRORS = []
+TEST_NUM = 0
+
+
+def ok(msg: str) -> None:
+    global TEST_NUM
+    TEST_NUM += 1
+    print(f"  [{TEST_NUM}] {msg} ... OK")
+
+
+def fail(msg: str) -> None:
+    global TEST_NUM, ERRORS
+    TEST_NUM += 1
+    print(f"  [{TEST_NUM}] {msg} ... FAIL")
+    ERRORS.append(f"  [{TEST_NUM}] {msg}")
+
+
+class CountingStream:
+    """Wraps a file stream and counts write() calls."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self._stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_file_handler(tmpdir: str) -> RotatingFileHandler:
+    fh = RotatingFileHandler(os.path.join(tmpdir, "inverter.log"),
+                             maxBytes=1024 * 1024, backupCount=1,
+                             encoding="utf-8")
+    fh.setFormatter(logging.Formatter("%(name)s %(message)s"))
+    fh.stream = CountingStream(fh.stream)
+    return fh
+
+
+def main() -> int:
+    print("=== Inverter log batching check ===")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 1. one write() per batch
+        fh = make_file_handler(tmpdir)
+        q = queue.SimpleQueue()
+        lg = queued_logger("Inverter", q)
+        for i in range(10):
+            lg.info("sample %d", i)
+        listener = BatchingQueueListener(q, fh, flush_interval=0.5)
+        listener.start()
+        listener.stop()
+        with open(fh.baseFilename, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if lines == [f"Inverter sample {i}" for i in range(10)]:
+            ok("all 10 records written in order")
+        else:
+            fail(f"unexpected file content: {lines!r}")
+        if fh.stream.writes == 1:
+            ok("10 records coalesced into one write()")
+        else:
+            fail(f"expected 1 write(), got {fh.stream.writes}")
+        fh.close()
+
+        # 2. batch_size bounds a drain
+        os.remove(os.path.join(tmpdir, "inverter.log"))
+        fh = make_file_handler(tmpdir)
+        q = queue.SimpleQueue()
+        lg = queued_logger("Inverter", q)
+        for i in range(10):
+            lg.info("sample %d", i)
+        listener = BatchingQueueListener(q, fh, batch_size=4)
+        listener.start()
+        listener.stop()
+        if fh.stream.writes == 3:
+            ok("batch_size=4 splits 10 records into 3 writes")
+        else:
+            fail(f"expected 3 writes, got {fh.stream.writes}")
+        fh.close()
+
+    # 3/4. stop() flushes; non-file handlers get every record
+    lh = ListHandler()
+    q = queue.SimpleQueue()
+    listener = BatchingQueueListener(q, lh, flush_interval=60.0)
+    listener.start()
+    lg = queued_logger("LOKI", q)
+    lg.info("inverter_metrics", extra={"batt_v": 52.1})
+    lg.info("inverter_metrics", extra={"batt_v": 52.2})
+    listener.stop()
+    if [r.batt_v for r in lh.records] == [52.1, 52.2]:
+        ok("stop() flushes pending records, extra fields preserved")
+    else:
+        fail(f"unexpected records: {[vars(r) for r in lh.records]!r}")
+
+    # 5. queued_logger does not register / mutate the shared logger
+    shared = logging.getLogger("LOKI")
+    if all(r.name == "LOKI" for r in lh.records) and lg is not shared \
+            and not shared.handlers:
+        ok("queued_logger keeps name, shared LOKI logger untouched")
+    else:
+        fail("queued_logger leaked into logging.getLogger('LOKI')")
+
+    # 6. flush_level cuts the batch short
+    lh = ListHandler()
+    q = queue.SimpleQueue()
+    listener = BatchingQueueListener(q, lh, flush_interval=60.0,
+                                     flush_level=logging.ERROR)
+    listener.start()
+    lg = queued_logger("BusinessDecisions", q)
+    lg.info("decision")
+    lg.error("switch_loop error")
+    deadline = time.monotonic() + 5.0
+    while len(lh.records) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    flushed = len(lh.records)
+    listener.stop()
+    if flushed == 2:
+        ok("ERROR record flushes the pending batch immediately")
+    else:
+        fail(f"expected 2 records flushed before flush_interval, got {flushed}")
+
+    print()
+    if ERRORS:
+        print(f"❌ {len(ERRORS)} check(s) failed:")
+        for e in ERRORS:
+            print(e)
+        return 1
+    print(f"✅ All {TEST_NUM} checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
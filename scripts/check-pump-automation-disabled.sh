@@ -78,42 +78,42 @@ else
 fi
 
 # ------------------------------------------------------------------
-# 4. _pump_loop is NOT started unconditionally
+# 4. _pump_tick is NOT started unconditionally
 # ------------------------------------------------------------------
 echo ""
-echo "--- Checking _pump_loop is gated ---"
+echo "--- Checking _pump_tick is gated ---"
 
 if grep -q "if self.pump_automation_enabled" "$SMC"; then
-    echo -e "${GREEN}OK: _pump_loop is conditionally started (if self.pump_automation_enabled)${NC}"
+    echo -e "${GREEN}OK: _pump_tick is conditionally started (if self.pump_automation_enabled)${NC}"
 else
-    echo -e "${RED}MISSING: _pump_loop conditional gate not found in $SMC${NC}"
-    echo "  SmartHomeController.start() must check self.pump_automation_enabled before creating _pump_loop task."
+    echo -e "${RED}MISSING: _pump_tick conditional gate not found in $SMC${NC}"
+    echo "  SmartHomeController.start() must check self.pump_automation_enabled before scheduling _pump_tick."
     ERRORS=$((ERRORS + 1))
 fi
 
 # Verify the old unconditional pattern is absent
-if grep "create_task.*_pump_loop" "$SMC" | grep -v "^[[:space:]]*#" | grep -qv "if self.pump_automation_enabled"; then
-    # This means create_task(_pump_loop) appears on a line NOT in an if block context
+if grep "append.*_pump_tick" "$SMC" | grep -v "^[[:space:]]*#" | grep -qv "if self.pump_automation_enabled"; then
+    # This means append(_pump_tick) appears on a line NOT in an if block context
     # But we already confirmed 'if self.pump_automation_enabled' exists above.
-    # Let's do a more precise check: the line with create_task and _pump_loop must be
+    # Let's do a more precise check: the line scheduling _pump_tick must be
     # on a line following (or inside) 'if self.pump_automation_enabled'
-    echo -e "${GREEN}OK: _pump_loop create_task references found (with conditional gate confirmed above)${NC}"
+    echo -e "${GREEN}OK: _pump_tick scheduling references found (with conditional gate confirmed above)${NC}"
 else
     # The grep didn't find any standalone unconditional pattern — good
-    echo -e "${GREEN}OK: no unconditional _pump_loop task creation detected${NC}"
+    echo -e "${GREEN}OK: no unconditional _pump_tick scheduling detected${NC}"
 fi
 
 # ------------------------------------------------------------------
-# 5. Switch loop still starts
+# 5. Switch tick still scheduled
 # ------------------------------------------------------------------
 echo ""
-echo "--- Checking switch loop is preserved ---"
+echo "--- Checking switch tick is preserved ---"
 
-if grep -q "create_task.*_switch_loop" "$SMC"; then
-    echo -e "${GREEN}OK: _switch_loop task creation found in $SMC${NC}"
+if grep -q "jobs = \[(self.switch_int, self._switch_tick)\]" "$SMC"; then
+    echo -e "${GREEN}OK: _switch_tick is scheduled unconditionally in $SMC${NC}"
 else
-    echo -e "${RED}MISSING: _switch_loop task creation not found in $SMC${NC}"
-    echo "  SmartHomeController.start() must create _switch_loop task."
+    echo -e "${RED}MISSING: _switch_tick scheduling not found in $SMC${NC}"
+    echo "  SmartHomeController.start() must schedule _switch_tick."
     ERRORS=$((ERRORS + 1))
 fi
 
@@ -444,12 +444,12 @@ if "startup_reset_coordinator" in ctrl_src:
 else:
     fail("No reset_coordinator param")
 
-# [32] _switch_loop has gate check
-switch_src = inspect.getsource(SmartHomeController._switch_loop)
+# [32] _switch_tick has gate check
+switch_src = inspect.getsource(SmartHomeController._switch_tick)
 if "is_gate_open" in switch_src or "gate" in switch_src.lower():
-    ok("_switch_loop has gate check")
+    ok("_switch_tick has gate check")
 else:
-    fail("No gate check in _switch_loop")
+    fail("No gate check in _switch_tick")
 
 # ================================================================
 # PART 7: TuyaStatusUpdaterAsync uses property_mapping
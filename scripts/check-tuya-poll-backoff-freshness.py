@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Validation: adaptive Tuya polling keeps device observations FRESH.
+
+Tests:
+1. Night-time backoff (unchanged states, night multiplier 5) never pauses
+   past FRESH_MAX_AGE_SECONDS minus the poll margin.
+2. An observation taken at one poll is still FRESH when the next poll
+   completes, even if that poll runs into TUYA_RPC_TIMEOUT.
+3. Daytime backoff still grows past the base interval.
+4. A changed state drops the pause back to the base interval.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Ensure repo root is on sys.path
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from app.devices.device_observation import (
+    FRESH_MAX_AGE_SECONDS,
+    DeviceObservationState,
+    ObservationFreshness,
+    ObservationValue,
+    compute_freshness,
+)
+from app.tuya.status_updater_async import (
+    FRESH_POLL_MARGIN,
+    TUYA_RPC_TIMEOUT,
+    TuyaStatusUpdaterAsync,
+)
+
+ERRORS = []
+TEST_NUM = 0
+
+NIGHT = datetime(2026, 1, 15, 23, 30)
+DAY = datetime(2026, 1, 15, 12, 0)
+STATE = [("relay-1", True), ("relay-2", False)]
+
+
+def ok(msg: str) -> None:
+    global TEST_NUM
+    TEST_NUM += 1
+    print(f"  [{TEST_NUM}] {msg} ... OK")
+
+
+def fail(msg: str) -> None:
+    global TEST_NUM, ERRORS
+    TEST_NUM += 1
+    print(f"  [{TEST_NUM}] {msg} ... FAIL")
+    ERRORS.append(f"  [{TEST_NUM}] {msg}")
+
+
+def backoff_delays(upd: TuyaStatusUpdaterAsync, now: datetime, cycles: int) -> list[float]:
+    delays = []
+    for _ in range(cycles):
+        upd._adapt_interval(list(STATE))
+        delays.append(upd._sleep_delay(now))
+    return delays
+
+
+def main() -> int:
+    print("=== Tuya poll backoff freshness check ===")
+
+    upd = TuyaStatusUpdaterAsync(interval=30)
+    delays = backoff_delays(upd, NIGHT, 8)
+    cap = FRESH_MAX_AGE_SECONDS - FRESH_POLL_MARGIN
+    if max(delays) <= cap:
+        ok(f"night backoff pause stays within {cap:.0f}s (max {max(delays):.0f}s)")
+    else:
+        fail(f"night backoff pause {max(delays):.0f}s exceeds {cap:.0f}s")
+
+    observed_at = NIGHT.replace(tzinfo=timezone.utc)
+    stale_at = []
+    for delay in delays:
+        obs = DeviceObservationState(
+            observed_state=ObservationValue.ON,
+            observed_at=observed_at,
+            observation_source="tuya",
+        )
+        # the next poll completes at most delay + TUYA_RPC_TIMEOUT later
+        refreshed_at = observed_at + timedelta(seconds=delay + TUYA_RPC_TIMEOUT)
+        if compute_freshness(obs, now_utc=refreshed_at) != ObservationFreshness.FRESH:
+            stale_at.append(delay)
+        observed_at = refreshed_at
+    if not stale_at:
+        ok("devices stay FRESH across a night-time backoff")
+    else:
+        fail(f"observation not FRESH before the next poll after pauses {stale_at}")
+
+    upd = TuyaStatusUpdaterAsync(interval=30)
+    delays = backoff_delays(upd, DAY, 8)
+    if delays[0] == 30 and max(delays) > 30:
+        ok(f"daytime backoff grows from 30s to {max(delays):.0f}s")
+    else:
+        fail(f"unexpected daytime backoff sequence {delays}")
+
+    upd._adapt_interval([("relay-1", False), ("relay-2", False)])
+    if upd._sleep_delay(DAY) == 30:
+        ok("state change resets the pause to the base interval")
+    else:
+        fail(f"pause after a state change is {upd._sleep_delay(DAY)}s, expected 30s")
+
+    print()
+    if ERRORS:
+        print(f"❌ {len(ERRORS)} check(s) failed:")
+        for e in ERRORS:
+            print(e)
+        return 1
+    print(f"✅ All {TEST_NUM} checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,58 @@
 # app/service/inverter_monitor.py
 import asyncio, logging
 from app.api import DessAPI, DeviceData
-from app.monitoring.inverter_logger import InverterLogger
-from app.utils.time_utils import smart_sleep
+from app.monitoring.inverter_logger import get_inverter_logger
+from app.utils.time_utils import night_multiplier, wait_stop
 from shared_state.shared_state import shared_state
 
 
 class InverterMonitor:
+    # после успешного, но долгого fetch — хотя бы такая пауза перед следующим
+    MIN_PAUSE_S = 5.0
+
     def __init__(self, dess_api: DessAPI, poll_sec: int = 60):
         self.api      = dess_api
         self.interval = poll_sec
-        self.logger   = InverterLogger()                  # файл + Loki
+        self.logger   = get_inverter_logger()             # файл + Loki
         self.imp      = logging.getLogger("IMPORTANT")    # один раз!
         self._stop    = asyncio.Event()
         self.last_data: DeviceData | None = None
 
     async def run(self) -> None:
-        while not self._stop.is_set():
-            try:
-                dd = await asyncio.to_thread(self.api.fetch_device_data)
-                self.last_data = dd
-                self.logger.log(dd)                       # Inverter log
-                self._process_business_metrics(dd)
-            except Exception as exc:
-                # отправим в Loki причину ошибки
-                self.imp.warning("[INV_MON] fetch failed: %s", exc,
-                                 extra={"type": "inverter", "evt": "fetch_fail"})
-            await smart_sleep(self._stop, self.interval)
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._stop.is_set():
+                started = loop.time()
+                ok = False
+                try:
+                    dd = await asyncio.to_thread(self.api.fetch_device_data)
+                    self.last_data = dd
+                    summary = dd.summary()                    # один раз на сэмпл
+                    self.logger.log(dd, summary)              # Inverter log
+                    self._process_business_metrics(dd, summary)
+                    ok = True
+                except Exception as exc:
+                    # отправим в Loki причину ошибки
+                    self.imp.warning("[INV_MON] fetch failed: %s", exc,
+                                     extra={"type": "inverter", "evt": "fetch_fail"})
+                # ритм опроса: период (с ночным множителем) отсчитываем от
+                # начала fetch, долгий fetch съедает паузу, а не сдвигает её.
+                # После ошибки (DESS лежит, fetch ушёл в таймауты) — полный
+                # период паузы, чтобы не долбить API и не терять ночной режим.
+                period = self.interval * night_multiplier()
+                if ok:
+                    delay = max(period - (loop.time() - started), self.MIN_PAUSE_S)
+                else:
+                    delay = period
+                await wait_stop(self._stop, delay)
+        finally:
+            self.logger.close()                           # дописать пачку
 
     def stop(self):
         self._stop.set()
 
-    def _process_business_metrics(self, dd: DeviceData) -> None:
+    def _process_business_metrics(self, dd: DeviceData,
+                                  summary: str | None = None) -> None:
         """
         Сохраняем актуальные значения в shared_state.
         Теперь ими могут пользоваться другие подсистемы
@@ -54,7 +75,8 @@ class InverterMonitor:
             ac_input_frequency=dd.ac_input_frequency,
             ac_output_load=dd.ac_output_load,
             working_mode=dd.working_state,
+            working_mode_uc=(dd.working_state or "").upper(),   # для сравнений в циклах
             mains_status=dd.mains_status,
             timestamp=dd.timestamp,
-            inverter_summary=dd.summary(),  # красивая строка для UI
+            inverter_summary=summary if summary is not None else dd.summary(),  # красивая строка для UI
         )
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from threading import RLock
 from typing import (
-    Any, Iterable, Mapping, Tuple, Union,
+    Any, Iterable, Mapping, Tuple, Union, overload,
 )
 
 _UpdateArg = Union[
@@ -14,6 +14,7 @@ _UpdateArg = Union[
 class _SharedState(dict):
     _instance: "_SharedState|None" = None
     _lock = RLock()
+    version: int = 0  # растёт на каждую запись — читатели сравнивают и пропускают
 
     def __new__(cls, *a, **kw):
         if cls._instance is None:
@@ -24,6 +25,7 @@ class _SharedState(dict):
     def __setitem__(self, k: str, v: Any) -> None:
         with self._lock:
             super().__setitem__(k, v)
+            self.version += 1
 
     def __getitem__(self, k: str) -> Any:  # noqa: ANN401
         with self._lock:
@@ -40,6 +42,43 @@ class _SharedState(dict):
                 super().update(**kw)
             else:
                 super().update(m, **kw)
+            self.version += 1
+
+    def update_changed(self, m: Mapping[str, Any]) -> bool:
+        """
+        Как update(), но пишет только изменившиеся ключи; если ничего
+        не изменилось — version не растёт и читатели тик пропускают.
+        Возвращает True, если что-то записано.
+        """
+        with self._lock:
+            get = dict.get
+            changed = {k: v for k, v in m.items()
+                       if k not in self or get(self, k) != v}
+            if not changed:
+                return False
+            super().update(changed)
+            self.version += 1
+            return True
+
+    # —————————————————————————————— snapshot ————————————————————
+    @overload
+    def snapshot(self) -> dict[str, Any]: ...
+
+    @overload
+    def snapshot(self, *keys: str) -> tuple[Any, ...]: ...
+
+    def snapshot(self, *keys: str):
+        """
+        Чтение за один захват lock'а — согласованная пара/набор значений.
+
+        * без аргументов — плоская копия всего состояния;
+        * ``snapshot("a", "b")`` — кортеж значений этих ключей (None, если нет).
+        """
+        with self._lock:
+            if not keys:
+                return dict.copy(self)
+            get = dict.get
+            return tuple(get(self, k) for k in keys)
 
 
 shared_state: _SharedState = _SharedState()